@@ -0,0 +1,78 @@
+"""Benchmark parsing config files with the pydantic-settings sources and our parsers."""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+from pydantic_settings.sources import (
+    JsonConfigSettingsSource,
+    TomlConfigSettingsSource,
+    YamlConfigSettingsSource,
+)
+
+from pydantic_configtree import Config
+from pydantic_configtree.sources import parse_config_file
+
+SIZES = {"10 kB": 10_000, "1 MB": 1_000_000, "10 MB": 10_000_000}
+
+
+def make_config(size):
+    # each component is roughly 100 bytes
+    return {
+        f"component_{i}": {
+            "threshold": 0.5 * i,
+            "name": f"component number {i}",
+            "values": [i, i + 1, i + 2],
+        }
+        for i in range(size // 100)
+    }
+
+
+def dump_toml(config):
+    lines = []
+    for name, component in config.items():
+        lines.append(f"[{name}]")
+        lines.append(f"threshold = {component['threshold']!r}")
+        lines.append(f"name = {json.dumps(component['name'])}")
+        lines.append(f"values = {component['values']!r}")
+    return "\n".join(lines)
+
+
+DUMP = {
+    ".json": json.dumps,
+    ".yaml": lambda config: yaml.dump(config, Dumper=yaml.CSafeDumper),
+    ".toml": dump_toml,
+}
+
+
+def parse_pydantic_settings(path):
+    if path.suffix == ".json":
+        return JsonConfigSettingsSource(Config, json_file=path).json_data
+    if path.suffix == ".toml":
+        return TomlConfigSettingsSource(Config, toml_file=path).toml_data
+    return YamlConfigSettingsSource(Config, yaml_file=path).yaml_data
+
+
+def measure(function, path):
+    start = time.perf_counter()
+    function(path)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'format':>6} {'size':>6} {'pydantic-settings [s]':>22} {'ours [s]':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt, dump in DUMP.items():
+            for label, size in SIZES.items():
+                path = Path(tmpdir) / f"config_{size}{fmt}"
+                path.write_text(dump(make_config(size)))
+
+                before = measure(parse_pydantic_settings, path)
+                after = measure(parse_config_file, path)
+                print(f"{fmt:>6} {label:>6} {before:>22.4f} {after:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
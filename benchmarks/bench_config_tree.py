@@ -0,0 +1,98 @@
+"""Benchmark validating the config of a component tree with 1000 leaf components."""
+
+import time
+from typing import Literal
+
+from pydantic import create_model, model_validator
+from pydantic_settings import BaseSettings
+
+from pydantic_configtree import Config, Configurable
+
+#: number of children of each node, 10 ** 3 leaves for 3 levels
+N_CHILDREN = 10
+N_LEVELS = 3
+N_VALIDATIONS = 10
+
+
+def define_tree():
+    """Define one Configurable per level, each containing a list of the next level."""
+
+    class Leaf(Configurable):
+        class __config__(Config):
+            threshold: float = 1.0
+            name: str = "leaf"
+
+    level = Leaf
+    for i in range(N_LEVELS):
+
+        class Node(Configurable):
+            class __config__(Config):
+                children: list[level.__config__] = []
+
+        Node.__name__ = Node.__qualname__ = f"Level{i}"
+        level = Node
+    return level
+
+
+class SettingsConfig(BaseSettings):
+    """Config running the settings sources for each validation, as used previously."""
+
+    model_config = Config.model_config
+
+
+def autofill_cls_model(model):
+    """Config model as created previously, filling cls with a before validator."""
+    fqdn = model.model_fields["cls"].default
+
+    def autofill_cls(cls, values):
+        if isinstance(values, dict) and "cls" not in values:
+            values = {**values, "cls": fqdn}
+        return values
+
+    fields = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if name == "cls":
+            fields[name] = (Literal[fqdn], ...)
+            continue
+        # rebuild nested configs the same way
+        if getattr(annotation, "__origin__", None) is list:
+            (item,) = annotation.__args__
+            annotation = list[autofill_cls_model(item)]
+        fields[name] = (annotation, field.default)
+
+    return create_model(
+        model.__name__,
+        __base__=SettingsConfig,
+        __validators__={"autofill_cls": model_validator(mode="before")(autofill_cls)},
+        **fields,
+    )
+
+
+def make_data(level=N_LEVELS):
+    if level == 0:
+        return {"threshold": 2.0}
+    return {"children": [make_data(level - 1) for _ in range(N_CHILDREN)]}
+
+
+def main():
+    root = define_tree()
+    data = make_data()
+
+    models = {
+        "previous": autofill_cls_model(root.__config__),
+        "current": root.__config__,
+    }
+    for label, model in models.items():
+        model.model_validate(data)
+        start = time.perf_counter()
+        for _ in range(N_VALIDATIONS):
+            model.model_validate(data)
+        duration = (time.perf_counter() - start) / N_VALIDATIONS
+        print(f"{label + ':':<10} {duration * 1e3:.1f} ms per validation")
+
+    print(f"({N_CHILDREN**N_LEVELS} leaves, {N_LEVELS} levels)")
+
+
+if __name__ == "__main__":
+    main()
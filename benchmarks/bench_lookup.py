@@ -0,0 +1,59 @@
+"""Benchmark cold Lookup.get against the previous linear fnmatch scan."""
+
+import timeit
+from fnmatch import fnmatch
+
+from pydantic_configtree.lookup import Lookup
+
+TYPES = ["LST", "MST_NectarCam", "MST_FlashCam", "SST"]
+
+
+def make_entries(n_entries):
+    entries = [("type", "*", 0.0), ("type", "MST*", 1.0)]
+    entries.extend(("type", t, float(i)) for i, t in enumerate(TYPES))
+    entries.extend(("id", i, float(i)) for i in range(n_entries - len(entries)))
+    return entries
+
+
+def scan_get(lookup_table, **kwargs):
+    """Previous implementation of Lookup.get without cache."""
+    value = None
+    for index_key, index_value in kwargs.items():
+        if (lookup := lookup_table.get(index_key)) is not None:
+            for definition, config_value in lookup.items():
+                if isinstance(definition, str):
+                    matches = fnmatch(index_value, definition)
+                else:
+                    matches = index_value == definition
+                if matches:
+                    value = config_value
+    return value
+
+
+def main():
+    print(f"{'entries':>8} {'scan [µs]':>12} {'index [µs]':>12} {'speedup':>8}")
+    for n_entries in (10, 1_000, 100_000):
+        lookup = Lookup(make_entries(n_entries), cache_size=0)
+        table = lookup._lookup_table
+        queries = [(TYPES[i % len(TYPES)], i) for i in range(0, n_entries, 7)][:50]
+
+        def run_scan():
+            for tel_type, tel_id in queries:
+                scan_get(table, type=tel_type, id=tel_id)
+
+        def run_index():
+            for tel_type, tel_id in queries:
+                lookup.get(type=tel_type, id=tel_id)
+
+        number = max(1, 20_000 // n_entries)
+        scan = min(timeit.repeat(run_scan, number=number, repeat=3))
+        index = min(timeit.repeat(run_index, number=number, repeat=3))
+        scale = 1e6 / (number * len(queries))
+        print(
+            f"{n_entries:>8} {scan * scale:>12.2f} {index * scale:>12.2f}"
+            f" {scan / index:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
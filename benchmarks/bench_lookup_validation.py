@@ -0,0 +1,50 @@
+"""Benchmark validating a config with many Lookup fields."""
+
+import time
+
+from pydantic import create_model
+from pydantic_core import SchemaValidator, core_schema
+
+from pydantic_configtree import Config
+from pydantic_configtree.lookup import Lookup
+
+N_FIELDS = 50
+N_VALIDATIONS = 10_000
+
+
+def main():
+    fields = {f"option_{i}": (Lookup[float], ...) for i in range(N_FIELDS)}
+    settings_cls = create_model("Settings", __base__=Config, **fields)
+
+    entries = [("type", "*", 1.0), ("type", "LST", 2.0), ("id", 1, 3.0)]
+    data = {name: entries for name in fields}
+
+    start = time.perf_counter()
+    for _ in range(N_VALIDATIONS):
+        settings_cls.model_validate(data)
+    duration = time.perf_counter() - start
+
+    # previously, a new SchemaValidator was built for each field in each validation
+    entries_schema = core_schema.list_schema(
+        core_schema.tuple_schema(
+            [
+                core_schema.str_schema(),
+                core_schema.any_schema(),
+                core_schema.float_schema(),
+            ]
+        )
+    )
+    n_builds = 1000
+    start = time.perf_counter()
+    for _ in range(n_builds):
+        SchemaValidator(entries_schema)
+    build_duration = (time.perf_counter() - start) / n_builds
+
+    previous = duration + N_VALIDATIONS * N_FIELDS * build_duration
+    print(f"{N_VALIDATIONS} validations of {N_FIELDS} Lookup[float] fields")
+    print(f"reused validator:          {duration:.2f} s")
+    print(f"validator per validation: ~{previous:.2f} s (estimated)")
+
+
+if __name__ == "__main__":
+    main()
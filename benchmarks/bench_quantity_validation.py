@@ -0,0 +1,51 @@
+"""Benchmark validating many quantities sharing a few units."""
+
+import time
+
+import astropy.units as u
+from astropy.units import Quantity
+from pydantic import BaseModel, create_model
+
+from pydantic_configtree.astropy import AstropyQuantity
+
+N_FIELDS = 1000
+N_VALIDATIONS = 20
+
+UNITS = [(u.m, "cm"), (u.deg, "rad"), (u.ns, "us")]
+
+
+def uncached(data, targets):
+    # what validation and serialization did before caching the units
+    for name, value in data.items():
+        q = Quantity(value["value"], unit=value["unit"]).to(targets[name])
+        {"value": q.value, "unit": q.unit.to_string("vounit")}
+
+
+def main():
+    fields = {}
+    data = {}
+    targets = {}
+    for i in range(N_FIELDS):
+        target, unit = UNITS[i % len(UNITS)]
+        fields[f"quantity_{i}"] = (AstropyQuantity[target], ...)
+        data[f"quantity_{i}"] = {"value": 0.5 * i, "unit": unit}
+        targets[f"quantity_{i}"] = target
+    model = create_model("Model", __base__=BaseModel, **fields)
+
+    start = time.perf_counter()
+    for _ in range(N_VALIDATIONS):
+        model.model_validate(data).model_dump()
+    duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(N_VALIDATIONS):
+        uncached(data, targets)
+    uncached_duration = time.perf_counter() - start
+
+    print(f"{N_VALIDATIONS} validations and dumps of {N_FIELDS} quantity fields")
+    print(f"cached units:         {duration:.2f} s")
+    print(f"parsing and to(unit): {uncached_duration:.2f} s (conversions only)")
+
+
+if __name__ == "__main__":
+    main()
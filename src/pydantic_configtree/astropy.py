@@ -1,9 +1,12 @@
 """pydantic type adapters for astropy types."""
 
+from functools import lru_cache, partial
+from pathlib import Path
 from typing import Annotated, Any
 
+import numpy as np
 from astropy.time import Time
-from astropy.units import Quantity, Unit
+from astropy.units import Quantity, Unit, UnitBase
 from pydantic import GetCoreSchemaHandler
 from pydantic_core import CoreSchema, core_schema
 
@@ -13,6 +16,28 @@ __all__ = [
 ]
 
 
+#: Number of decimal places of the seconds in serialized times
+TIME_PRECISION = 9
+
+
+def _parse_time(value):
+    # explicit format and scale skip the format guessing, which is much slower
+    try:
+        return Time(value, format="isot", scale="utc")
+    except ValueError:
+        return Time(value)
+
+
+def _serialize_time(t):
+    # only copy the time if scale or precision need to be changed
+    if t.scale != "utc":
+        t = t.utc
+    if t.precision != TIME_PRECISION:
+        t = t.replicate()
+        t.precision = TIME_PRECISION
+    return t.isot.tolist() if t.shape else t.isot
+
+
 class _AstropyTimeTypeAnnotation:
     @classmethod
     def __get_pydantic_core_schema__(
@@ -20,8 +45,13 @@ class _AstropyTimeTypeAnnotation:
     ) -> CoreSchema:
         from_string = core_schema.chain_schema(
             [
-                core_schema.str_schema(),
-                core_schema.no_info_plain_validator_function(lambda s: Time(s)),
+                core_schema.union_schema(
+                    [
+                        core_schema.str_schema(),
+                        core_schema.list_schema(core_schema.str_schema()),
+                    ]
+                ),
+                core_schema.no_info_plain_validator_function(_parse_time),
             ]
         )
 
@@ -29,7 +59,7 @@ class _AstropyTimeTypeAnnotation:
             python_schema=core_schema.is_instance_schema(Time),
             json_schema=from_string,
             serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda t: Time(t, precision=9).utc.isot,
+                _serialize_time,
             ),
         )
 
@@ -37,18 +67,74 @@ class _AstropyTimeTypeAnnotation:
 #: Type adapter for `astropy.time.Time`.
 #:
 #: JSON serialization is implemented from/to ISO UTC string.
+#: Time arrays are serialized to and parsed from a list of strings,
+#: which are converted in a single call.
 AstropyTime = Annotated[
     Time,
     _AstropyTimeTypeAnnotation,
 ]
 
 
+#: Maximum number of entries of each of the unit caches
+UNIT_CACHE_SIZE = 1024
+
+
+# configs typically use many quantities with only a few distinct units,
+# parsing and converting units is much more expensive than the arithmetic
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _parse_unit(unit: str) -> UnitBase:
+    return Unit(unit)
+
+
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _conversion_factor(source: UnitBase, target: UnitBase) -> float:
+    return source.to(target)
+
+
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _unit_to_string(unit: UnitBase) -> str:
+    return unit.to_string("vounit")
+
+
+def _quantity_from_dict(d):
+    # a single conversion of the whole array, instead of one per element
+    value = np.asarray(d["value"], dtype=float)
+    return Quantity(value, unit=_parse_unit(d["unit"]), copy=False)
+
+
+def _quantity_from_npy(d):
+    # the file containing the reference is unknown during validation,
+    # relative paths would silently depend on the working directory
+    path = Path(d["npy"]).expanduser()
+    if not path.is_absolute():
+        raise ValueError(f"Path of npy file must be absolute, got {d['npy']!r}")
+    value = np.load(path, allow_pickle=False)
+    return Quantity(value, unit=_parse_unit(d["unit"]), copy=False)
+
+
+def _convert_quantity(q: Quantity, unit: UnitBase) -> Quantity:
+    # subclasses like logarithmic quantities need their own conversion
+    if type(q) is not Quantity:
+        return q.to(unit)
+    return (q.value * _conversion_factor(q.unit, unit)) << unit
+
+
+def _serialize_quantity(q):
+    # tolist converts the whole array at once, for scalars it returns a float
+    return {"value": q.value.tolist(), "unit": _unit_to_string(q.unit)}
+
+
 class AstropyQuantity:
     """
-    Type adapter for `astropy.time.Time`.
+    Type adapter for `astropy.units.Quantity`.
 
     Serialization is implemented to a value/unit dict
     and parsing additionally supports plain strings.
+
+    Array quantities are given as (nested) list of values with a single unit,
+    e.g. ``{"value": [1.0, 2.0], "unit": "m"}``, or as reference to a ``.npy`` file,
+    e.g. ``{"npy": "/data/pixel_gains.npy", "unit": "m"}``, and are serialized
+    to a nested list. The path of the ``.npy`` file must be absolute.
     """
 
     @classmethod
@@ -56,19 +142,30 @@ class AstropyQuantity:
         cls, _source_type: Any, _handler: GetCoreSchemaHandler
     ) -> CoreSchema:
         """Pydantic schema definition for astropy quantity."""
+        value_schema = core_schema.union_schema(
+            [core_schema.float_schema(), core_schema.list_schema()]
+        )
         dict_schema = core_schema.chain_schema(
             [
                 core_schema.typed_dict_schema(
                     {
-                        "value": core_schema.typed_dict_field(
-                            core_schema.float_schema()
-                        ),
+                        "value": core_schema.typed_dict_field(value_schema),
                         "unit": core_schema.typed_dict_field(core_schema.str_schema()),
                     }
                 ),
-                core_schema.no_info_plain_validator_function(
-                    lambda d: Quantity(d["value"], unit=d["unit"])
+                core_schema.no_info_plain_validator_function(_quantity_from_dict),
+            ]
+        )
+
+        npy_schema = core_schema.chain_schema(
+            [
+                core_schema.typed_dict_schema(
+                    {
+                        "npy": core_schema.typed_dict_field(core_schema.str_schema()),
+                        "unit": core_schema.typed_dict_field(core_schema.str_schema()),
+                    }
                 ),
+                core_schema.no_info_plain_validator_function(_quantity_from_npy),
             ]
         )
 
@@ -82,22 +179,24 @@ class AstropyQuantity:
         python_schema = core_schema.union_schema(
             [
                 dict_schema,
+                npy_schema,
                 str_schema,
                 core_schema.is_instance_schema(Quantity),
             ]
         )
-        json_schema = core_schema.union_schema([dict_schema, str_schema])
+        json_schema = core_schema.union_schema([dict_schema, npy_schema, str_schema])
 
         return core_schema.json_or_python_schema(
             python_schema=python_schema,
             json_schema=json_schema,
             serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda q: {"value": q.value, "unit": q.unit.to_string("vounit")}
+                _serialize_quantity
             ),
         )
 
     def __class_getitem__(cls, unit: Unit):
         """Implement support for AstropyQuantity[<unit>]."""
+        unit = Unit(unit)
 
         class _QuantityWithUnit:
             @classmethod
@@ -109,11 +208,13 @@ class AstropyQuantity:
                     [
                         base,
                         core_schema.no_info_plain_validator_function(
-                            lambda q: q.to(unit)
+                            partial(_convert_quantity, unit=unit)
                         ),
                     ]
                 )
                 with_unit["serialization"] = base["serialization"]
                 return with_unit
 
+        # make the unit part of the repr, e.g. for schema hashes
+        _QuantityWithUnit.__qualname__ = f"AstropyQuantity[{unit.to_string()}]"
         return Annotated[Quantity, _QuantityWithUnit]
@@ -1,72 +1,313 @@
 """Core definitions."""
 
+import copy
+import importlib
 import logging
+import sys
+import threading
 import weakref
 from abc import ABCMeta
+from collections import Counter
 from collections.abc import Mapping
-from inspect import isabstract
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from importlib.metadata import entry_points
+from inspect import Parameter, isabstract, signature
+from types import FunctionType
 from typing import Annotated, Literal, Self, Union
 
-from pydantic import Field, create_model, model_validator
+from pydantic import BaseModel, Field, create_model, model_serializer
+from pydantic_core import core_schema, from_json
 from pydantic_settings import BaseSettings
 
+from .sources import LazySection
+
 __all__ = [
     "Config",
     "Configurable",
     "ConfigurableMeta",
+    "count_validations",
 ]
 
+#: Counter of config validations, set by count_validations
+_validation_counter = ContextVar("_validation_counter", default=None)
+
+
+#: Key of the not yet validated sections in the private attributes of a Config
+_LAZY_SECTIONS = "__lazy_sections__"
+_lazy_sections_lock = threading.RLock()
+#: Guards adding children to and listing the children of Configurables
+_children_lock = threading.Lock()
+
+
+def _can_defer_sections(cls):
+    # deferred fields hold their default until first access, model validators
+    # would only see the defaults and frozen models cannot be updated later
+    return (
+        not cls.__pydantic_decorators__.model_validators
+        and not cls.model_config.get("frozen", False)
+    )
+
+
+class _LazySectionsModel(BaseModel):
+    """Base of `Config` receiving the values of the settings sources.
+
+    Placed between ``BaseSettings`` and ``BaseModel`` in the mro of `Config`,
+    so sections are only deferred when validating the values of the settings
+    sources, and validating nested configs does not call python code.
+    """
+
+    def __init__(self, /, **values):  # noqa: D107
+        lazy = {}
+        if any(type(value) is LazySection for value in values.values()):
+            cls = type(self)
+            fields = cls.model_fields
+            defer = _can_defer_sections(cls)
+            for key, value in list(values.items()):
+                if type(value) is not LazySection:
+                    continue
+
+                field = fields.get(key)
+                if (
+                    not defer
+                    or field is None
+                    or field.is_required()
+                    or field.validation_alias
+                ):
+                    values[key] = value.load()
+                else:
+                    lazy[key] = values.pop(key)
+
+        super().__init__(**values)
+
+        if lazy:
+            # remove the defaults, so that __getattr__ is called on access
+            for key in lazy:
+                self.__dict__.pop(key, None)
+            self.__pydantic_fields_set__.update(lazy)
+            private = self.__pydantic_private__ or {}
+            object.__setattr__(
+                self, "__pydantic_private__", {**private, _LAZY_SECTIONS: lazy}
+            )
+
 
-class Config(BaseSettings):
-    """Base pydantic model for configuration."""
+class Config(BaseSettings, _LazySectionsModel):
+    """Base pydantic model for configuration.
+
+    The settings sources, e.g. environment variables, are only used when calling
+    the config class, which is also done when creating a `Configurable` from
+    a mapping or without config. ``model_validate``, ``model_validate_json`` and
+    configs nested in another config only validate the given values,
+    in particular nested configs do not read environment variables named like
+    their fields.
+
+    Sections of sectioned config files (see `~pydantic_configtree.sources.LazySection`)
+    given for fields with a default are only validated on first access of the field,
+    unless the config has model validators or is frozen.
+    Dumping, comparing, deep copying or pickling the config validates all remaining
+    sections, shallow copies keep them.
+    """
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):  # noqa: D105
+        schema = handler(source)
+        # pydantic-core calls a custom __init__, i.e. the settings sources of
+        # BaseSettings, for each validation, also for each nested config.
+        # Disable it, so validating a tree of configs stays in pydantic-core
+        if schema["type"] == "model":
+            schema["custom_init"] = False
+        return schema
+
+    @model_serializer(mode="wrap")
+    def _serialize_with_cls(self, handler, info):
+        # also called for configs nested in other models, which do not use model_dump
+        self._validate_lazy_sections()
+        data = handler(self)
+        # cls is needed to select the model when validating the dump again,
+        # keep it also when excluding unset or default values
+        if (
+            isinstance(data, dict)
+            and "cls" not in data
+            and "cls" in type(self).model_fields
+            and not (info.exclude and "cls" in info.exclude)
+            and (info.include is None or "cls" in info.include)
+        ):
+            data["cls"] = self.cls
+        return data
+
+    def _validate_lazy_section(self, name):
+        with _lazy_sections_lock:
+            private = self.__pydantic_private__
+            lazy = private.get(_LAZY_SECTIONS) if private else None
+            if not lazy or name not in lazy:
+                return
+
+            self.__pydantic_validator__.validate_assignment(
+                self, name, lazy[name].load()
+            )
+            self._discard_lazy_section(name)
+
+    def _discard_lazy_section(self, name):
+        # also used after assigning a new value, the section must not be validated
+        with _lazy_sections_lock:
+            private = self.__pydantic_private__
+            lazy = private.get(_LAZY_SECTIONS) if private else None
+            if not lazy or name not in lazy:
+                return
+
+            del lazy[name]
+            if not lazy:
+                del private[_LAZY_SECTIONS]
+                if not private:
+                    object.__setattr__(self, "__pydantic_private__", None)
+
+    def _validate_lazy_sections(self):
+        private = self.__pydantic_private__
+        if private and _LAZY_SECTIONS in private:
+            for name in list(private[_LAZY_SECTIONS]):
+                self._validate_lazy_section(name)
+
+    def __getattr__(self, name):  # noqa: D105
+        try:
+            private = object.__getattribute__(self, "__pydantic_private__")
+        except AttributeError:
+            private = None
+
+        if private and name in private.get(_LAZY_SECTIONS, ()):
+            self._validate_lazy_section(name)
+            return self.__dict__[name]
+
+        return super().__getattr__(name)
+
+    def __eq__(self, other):  # noqa: D105
+        self._validate_lazy_sections()
+        if isinstance(other, Config):
+            other._validate_lazy_sections()
+        return super().__eq__(other)
+
+    def __iter__(self):  # noqa: D105
+        self._validate_lazy_sections()
+        return super().__iter__()
+
+    def __copy__(self):  # noqa: D105
+        with _lazy_sections_lock:
+            new = super().__copy__()
+        # the copy keeps the remaining sections, but validates them on its own
+        private = new.__pydantic_private__
+        if private and _LAZY_SECTIONS in private:
+            private[_LAZY_SECTIONS] = dict(private[_LAZY_SECTIONS])
+        return new
+
+    def __deepcopy__(self, memo=None):  # noqa: D105
+        self._validate_lazy_sections()
+        return super().__deepcopy__(memo)
+
+    def __getstate__(self):  # noqa: D105
+        self._validate_lazy_sections()
+        return super().__getstate__()
+
+    def __repr_args__(self):  # noqa: D105
+        yield from super().__repr_args__()
+        if self.__pydantic_private__:
+            yield from self.__pydantic_private__.get(_LAZY_SECTIONS, {}).items()
+
+
+def _create_config_model(config_cls, name, module, qualname):
+    # add field "cls" to config, needed to select correct element in Union via config
+    if module is not None:
+        fqdn = f"{module}.{qualname}"
+    else:
+        fqdn = name
+
+    cls_type = Literal[name, fqdn]
+
+    # name the model after the attribute it is stored in, so it can be found
+    # by qualified name, e.g. for pickling, also when using the default config.
+    # cls is filled using a default instead of a validator, so validating
+    # a tree of configs does not call python code for each node.
+    return create_model(
+        f"{qualname}.__config__",
+        cls=(cls_type, fqdn),
+        __base__=config_cls,
+        __module__=module,
+        __doc__=config_cls.__doc__,
+    )
+
+
+class _LazyConfig:
+    """Descriptor creating the config model of a Configurable on first access.
+
+    On first access, the descriptor replaces itself with the created model.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.owner = None
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+
+    def __get__(self, instance, owner=None):
+        with self.lock:
+            config_cls = self.owner.__dict__["__config__"]
+            if config_cls is self:
+                config_cls = self.factory()
+                setattr(self.owner, "__config__", config_cls)
+        return config_cls
 
 
 class ConfigurableMeta(ABCMeta):
-    """Metaclass for Configurable."""
+    """Metaclass for Configurable.
+
+    Adds the ``cls`` field to the ``__config__`` model of each class.
+    Passing ``lazy_config=True`` as class keyword defers the creation of the
+    ``__config__`` model to its first access, for this class and all its subclasses.
+    """
 
-    def __new__(cls, name, bases, dct):
+    def __new__(cls, name, bases, dct, lazy_config=None):
         """Validate and create new Configurable class."""
         # create an empty config in case none is defined
         config_cls = dct.get("__config__", Config)
 
-        # add field "cls" to config, needed to select correct element in Union via config
+        # only validate concrete implementations, not the Configurable base class or abstract classes
+        if not (isinstance(config_cls, type) and issubclass(config_cls, Config)):
+            raise TypeError(
+                f"{name}.__config__ must be a subclass of {Config}, got: {config_cls}"
+            )
+
+        if lazy_config is None:
+            lazy_config = any(getattr(base, "__lazy_config__", False) for base in bases)
+        dct["__lazy_config__"] = lazy_config
+
         module = dct.get("__module__")
         qualname = dct.get("__qualname__", name)
-        if module is not None:
-            fqdn = f"{module}.{qualname}"
+        if lazy_config:
+            dct["__config__"] = _LazyConfig(
+                partial(_create_config_model, config_cls, name, module, qualname)
+            )
         else:
-            fqdn = name
-
-        cls_type = Literal[name, fqdn]
-
-        def autofill_cls(cls, values):
-            values.setdefault("cls", fqdn)
-            return values
-
-        config_cls = create_model(
-            config_cls.__qualname__,
-            cls=cls_type,
-            __base__=config_cls,
-            __module__=module,
-            __doc__=config_cls.__doc__,
-            __validators__={
-                "autofill_cls": model_validator(mode="before")(autofill_cls),
-            },
-        )
+            dct["__config__"] = _create_config_model(config_cls, name, module, qualname)
 
-        # only validate concrete implementations, not the Configurable base class or abstract classes
-        if not issubclass(config_cls, Config):
-            raise TypeError(
-                f"{name}.config_cls must be a subclass of {Config}, got: {config_cls.__bases__}"
-            )
+        new_cls = super().__new__(cls, name, bases, dct)
+
+        # the set of subclasses changed for all Configurable base classes
+        for base in new_cls.__mro__[1:]:
+            if isinstance(base, ConfigurableMeta):
+                base._registry = None
 
-        dct["__config__"] = config_cls
-        return super().__new__(cls, name, bases, dct)
+        return new_cls
 
 
 class Configurable(metaclass=ConfigurableMeta):
     """Base class for all configurable classes."""
 
+    #: Instrumentation of the methods, inherited from the parent, see `Instrumentation`
+    _instrumentation = None
+    #: Children created with this instance as parent, set when adding the first child
+    _children = ()
+
     def __init__(
         self,
         config: Config | None = None,
@@ -75,12 +316,7 @@ class Configurable(metaclass=ConfigurableMeta):
     ):
         self.name = name or self.__class__.__name__
 
-        if config is None:
-            config = self.__config__()
-        elif not isinstance(config, self.__config__):
-            config = self.__config__.model_validate(config)
-
-        self.config: self.__config__ = config
+        self.config: self.__config__ = self._validate_config(config)
         self._parent = weakref.ref(parent) if parent is not None else None
 
         if self.parent is None:
@@ -88,6 +324,97 @@ class Configurable(metaclass=ConfigurableMeta):
         else:
             self.log = self.parent.log.getChild(self.name)
 
+            # children might be walked from another thread, e.g. by ConfigWatcher
+            with _children_lock:
+                if "_children" not in parent.__dict__:
+                    parent._children = weakref.WeakSet()
+                parent._children.add(self)
+
+            if parent._instrumentation is not None:
+                self._instrumentation = parent._instrumentation
+                self._instrumentation.instrument(self)
+
+    @classmethod
+    def _validate_config(cls, config):
+        config_cls = cls.__config__
+
+        # already validated, use as is without copying
+        if isinstance(config, config_cls):
+            return config
+
+        if (counter := _validation_counter.get()) is not None:
+            counter[cls.__qualname__] += 1
+
+        if config is None:
+            return config_cls()
+
+        if isinstance(config, BaseModel) and issubclass(config_cls, type(config)):
+            # validated config of a base class, e.g. the base class config
+            # declared in the parent config. Only the top-level fields are validated again,
+            # already validated nested configs are reused as they are.
+            values = {
+                field: getattr(config, field)
+                for field in config.model_fields_set
+                if field != "cls"
+            }
+            return config_cls.__pydantic_validator__.validate_python(
+                values, by_name=True
+            )
+
+        if isinstance(config, Mapping):
+            # top-level config, use the settings sources
+            return config_cls(**config)
+
+        return config_cls.model_validate(config)
+
+    def config_changed(self, old_config: Config, changed: list[tuple[str, ...]]):
+        """Update state derived from the config after it was reloaded.
+
+        Called by `~pydantic_configtree.reload.ConfigWatcher` after ``self.config``
+        was replaced. Only the changed fields were validated again, all other
+        values, e.g. `~pydantic_configtree.lookup.Lookup` instances and their caches,
+        are shared with ``old_config``.
+        The default implementation does nothing.
+
+        Parameters
+        ----------
+        old_config : Config
+            The config before the reload.
+        changed : list[tuple[str, ...]]
+            Paths of the changed fields relative to ``self.config``,
+            an empty tuple if the whole config was validated again.
+        """
+
+    def __reduce__(self):
+        """Pickle only the validated config as JSON.
+
+        The instance is created again from the config using `from_config`,
+        as the root of a new tree, i.e. without parent. All other state has to be
+        derived from the config in ``__init__``, subclasses whose ``__init__``
+        takes additional parameters raise a `TypeError` unless they implement
+        ``__reduce__`` themselves.
+        """
+        return _reduce_to_config(self, _from_config_json)
+
+    def __copy__(self):
+        """Shallow copy, sharing config, parent and all attributes.
+
+        The copy is neither instrumented nor the parent of the children of ``self``.
+        """
+        new = type(self).__new__(type(self))
+        new.__dict__.update(_copied_state(self))
+        return new
+
+    def __deepcopy__(self, memo):
+        """Deep copy of all attributes, the copy keeps the parent.
+
+        The copy is neither instrumented nor the parent of the children of ``self``.
+        """
+        new = type(self).__new__(type(self))
+        memo[id(self)] = new
+        new.__dict__.update(copy.deepcopy(_copied_state(self), memo))
+        return new
+
     @property
     def parent(self) -> "Configurable | None":
         """The parent class of this class in the config hierarchy."""
@@ -95,30 +422,67 @@ class Configurable(metaclass=ConfigurableMeta):
             return None
         return self._parent()
 
+    @property
+    def children(self) -> list["Configurable"]:
+        """The existing Configurables created with this instance as parent."""
+        with _children_lock:
+            return list(self._children)
+
+    @classmethod
+    def _subclass_registry(cls) -> "_SubclassRegistry":
+        # only look at the class itself, not at registries of base classes
+        registry = cls.__dict__.get("_registry")
+        if registry is None:
+            registry = _SubclassRegistry(cls)
+            cls._registry = registry
+        return registry
+
     @classmethod
-    def configurable_subclasses(cls):
+    def configurable_subclasses(cls, import_on_demand: bool = False):
         """
         Union of non-abstract classes with discriminator annotation.
 
         Return a union that is suitable for use in Config classes to allow
         all non-abstract subclasses of this class to be configured
+
+        Parameters
+        ----------
+        import_on_demand : bool
+            If True, the subclass is only looked up when the config is validated,
+            importing it if needed, see `from_config`.
+            This allows using subclasses in modules that are not yet imported,
+            but the CLI does not know about the options of the subclasses.
         """
-        subclasses = _non_abstract_subclasses(cls)
-        config_classes = tuple(cls.__config__ for cls in subclasses)
-        union = Union.__getitem__(config_classes)
-        return Annotated[union, Field(discriminator="cls")]
+        if import_on_demand:
+            return Annotated[Config, _ImportOnDemand(cls)]
+
+        registry = cls._subclass_registry()
+
+        # cached, so that all config classes using it share the same union
+        if registry.union is None:
+            config_classes = tuple(sub.__config__ for sub in registry.by_fqdn.values())
+            union = Union.__getitem__(config_classes)
+            registry.union = Annotated[union, Field(discriminator="cls")]
+
+        return registry.union
 
     @classmethod
     def non_abstract_subclasses(cls) -> dict[str, Self]:
         """Get a dictionary of non-abstract children of this Configurable."""
-        return {
-            f"{sub.__module__}.{sub.__qualname__}": sub
-            for sub in _non_abstract_subclasses(cls)
-        }
+        return dict(cls._subclass_registry().by_fqdn)
 
     @classmethod
     def from_config(cls, config, parent=None, name=None, **kwargs) -> Self:
-        """Create a new instance by selecting the correct subclass based on the config object."""
+        """Create a new instance by selecting the correct subclass based on the config object.
+
+        Subclasses that are not yet imported are found by importing the module
+        of a fully qualified ``cls``, e.g. ``mypkg.cleaning.TailcutsCleaner``,
+        or using an entry point named like ``cls`` in the
+        ``pydantic_configtree.configurables`` group, e.g.::
+
+            [project.entry-points."pydantic_configtree.configurables"]
+            TailcutsCleaner = "mypkg.cleaning:TailcutsCleaner"
+        """
         if config is None:
             return None
 
@@ -127,21 +491,229 @@ class Configurable(metaclass=ConfigurableMeta):
         else:
             subcls_name = config.cls
 
-        subclasses = cls.non_abstract_subclasses()
+        subcls = cls._find_subclass(subcls_name)
+        return subcls(config=config, parent=parent, name=name, **kwargs)
 
-        # first try by fqdn
-        subcls = subclasses.get(subcls_name)
+    @classmethod
+    def _find_subclass(cls, subcls_name: str) -> type[Self]:
+        registry = cls._subclass_registry()
 
-        # fallback to name in case not found by fqdn
+        # first try by fqdn, fallback to name in case not found by fqdn
+        subcls = registry.by_fqdn.get(subcls_name)
         if subcls is None:
-            by_name = {v.__name__: v for v in subclasses.values()}
-            subcls = by_name.get(subcls_name)
+            subcls = registry.by_name.get(subcls_name)
+
+        # importing defines new subclasses, which resets the registry
+        if subcls is None and subcls_name not in registry.ambiguous:
+            if _import_subclass_module(subcls_name):
+                return cls._find_subclass(subcls_name)
 
         # error in case we still didn't find it
         if subcls is None:
+            if subcls_name in registry.ambiguous:
+                candidates = ", ".join(registry.ambiguous[subcls_name])
+                raise ValueError(
+                    f"{subcls_name} is ambiguous for subclasses of {cls},"
+                    f" use one of the fully qualified names: {candidates}"
+                )
             raise ValueError(f"{subcls_name} is not a known subclass of {cls}")
 
-        return subcls(config=config, parent=parent, name=name, **kwargs)
+        return subcls
+
+
+def _copied_state(component):
+    # the wrappers of the instrumentation are bound to the original instance
+    # and the children were created with the original as parent
+    return {
+        key: value
+        for key, value in component.__dict__.items()
+        if key not in ("_instrumentation", "_children")
+        and not (
+            isinstance(value, FunctionType) and hasattr(value, "__instrumentation__")
+        )
+    }
+
+
+#: Parameters of Configurable.__init__ restored when unpickling
+_REDUCED_PARAMETERS = {"self", "config", "parent", "name"}
+
+
+def _reduce_to_config(component, factory):
+    """Reduce ``component`` to a call of ``factory`` with class name, config and name."""
+    cls = type(component)
+    # values of other parameters are unknown and would silently be lost
+    extra = [
+        parameter.name
+        for parameter in signature(cls.__init__).parameters.values()
+        if parameter.name not in _REDUCED_PARAMETERS
+        and parameter.kind not in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+    ]
+    if extra:
+        raise TypeError(
+            f"Cannot pickle {cls.__qualname__} using its config, __init__ has"
+            f" the additional parameters {extra}, implement __reduce__ instead"
+        )
+    return (
+        factory,
+        (
+            f"{cls.__module__}.{cls.__qualname__}",
+            component.config.model_dump_json(by_alias=True),
+            component.name,
+        ),
+    )
+
+
+def _from_config_json(cls_name, config_json, name):
+    config = from_json(config_json)
+    config["cls"] = cls_name
+    return Configurable.from_config(config, name=name)
+
+
+@contextmanager
+def count_validations():
+    """Count the config validations triggered when creating Configurables.
+
+    Configs that are already instances of the ``__config__`` model of a Configurable
+    are used as they are and do not count as validation.
+
+    Yields
+    ------
+    collections.Counter
+        Number of validations by qualified name of the Configurable.
+
+    Examples
+    --------
+    >>> class Foo(Configurable):
+    ...     pass
+    >>> with count_validations() as counts:
+    ...     foo = Foo()
+    ...     foo = Foo(config=foo.config)
+    >>> counts["Foo"]
+    1
+    """
+    counter = Counter()
+    token = _validation_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _validation_counter.reset(token)
+
+
+#: Entry point group to find Configurables by name for `Configurable.from_config`
+ENTRY_POINT_GROUP = "pydantic_configtree.configurables"
+
+
+def _import_subclass_module(subcls_name: str) -> bool:
+    """Import the module defining ``subcls_name``, return whether a module was imported."""
+    if "." in subcls_name:
+        # the qualified name might be nested, try all possible module names
+        parts = subcls_name.split(".")
+        for end in range(len(parts) - 1, 0, -1):
+            module = ".".join(parts[:end])
+            if module in sys.modules:
+                return False
+            try:
+                importlib.import_module(module)
+                return True
+            except ModuleNotFoundError as e:
+                # only ignore the error if the module itself does not exist
+                if e.name is None or not (module + ".").startswith(e.name + "."):
+                    raise
+        return False
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP, name=subcls_name):
+        module = entry_point.module
+        if module not in sys.modules:
+            entry_point.load()
+            return True
+    return False
+
+
+class _ImportOnDemand:
+    """Validate the config of a subclass of ``base``, looked up during validation.
+
+    See `Configurable.configurable_subclasses`.
+    """
+
+    def __init__(self, base):
+        self.base = base
+
+    def __repr__(self):
+        return f"ImportOnDemand({self.base.__module__}.{self.base.__qualname__})"
+
+    def validate(self, value):
+        if isinstance(value, Mapping):
+            subcls_name = value.get("cls")
+        else:
+            subcls_name = getattr(value, "cls", None)
+
+        if subcls_name is None:
+            raise ValueError(f"cls is required to select a subclass of {self.base}")
+
+        subcls = self.base._find_subclass(subcls_name)
+        if isinstance(value, Mapping):
+            # nested config, only validate the given values without the settings
+            # sources, the same as the configs in a union of subclasses
+            return subcls.__config__.__pydantic_validator__.validate_python(value)
+        return subcls._validate_config(value)
+
+    def __get_pydantic_core_schema__(self, _source_type, _handler):
+        # the subclasses are not known in advance, JSON schema only requires cls
+        input_schema = core_schema.typed_dict_schema(
+            {"cls": core_schema.typed_dict_field(core_schema.str_schema())},
+            extra_behavior="allow",
+        )
+        return core_schema.no_info_plain_validator_function(
+            self.validate,
+            json_schema_input_schema=input_schema,
+            # serialize using the model of the actual value
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value,
+                return_schema=core_schema.any_schema(),
+            ),
+        )
+
+
+class _SubclassRegistry:
+    """Index of the non-abstract subclasses of a Configurable by fqdn and name.
+
+    Created lazily and discarded by ConfigurableMeta when a new subclass is defined.
+    Like ``__subclasses__``, the index only keeps weak references to the subclasses,
+    the registry is also discarded when one of them is garbage collected.
+    """
+
+    __slots__ = ("by_fqdn", "by_name", "ambiguous", "union", "_base", "_refs")
+
+    def __init__(self, base):
+        self.union = None
+        self.by_fqdn = weakref.WeakValueDictionary()
+        self.by_name = weakref.WeakValueDictionary()
+        self.ambiguous = {}
+        self._base = weakref.ref(base)
+        self._refs = []
+
+        for subcls in _non_abstract_subclasses(base):
+            fqdn = f"{subcls.__module__}.{subcls.__qualname__}"
+            self.by_fqdn[fqdn] = subcls
+            self._refs.append(weakref.ref(subcls, self._discard))
+
+        for fqdn, subcls in self.by_fqdn.items():
+            name = subcls.__name__
+            if name in self.ambiguous:
+                self.ambiguous[name].append(fqdn)
+            elif name in self.by_name:
+                other = self.by_name.pop(name)
+                self.ambiguous[name] = [
+                    f"{other.__module__}.{other.__qualname__}",
+                    fqdn,
+                ]
+            else:
+                self.by_name[name] = subcls
+
+    def _discard(self, _ref):
+        base = self._base()
+        if base is not None and base.__dict__.get("_registry") is self:
+            base._registry = None
 
 
 def _non_abstract_subclasses(base):
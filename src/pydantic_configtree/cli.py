@@ -1,32 +1,82 @@
 """Command-line support."""
 
 import logging.config
+import sys
 from abc import abstractmethod
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from os import PathLike
+from pathlib import Path
+from typing import Self
 
 from pydantic import AliasChoices, Field, FilePath
+from pydantic_core import from_json
 from pydantic_settings import (
     BaseSettings,
+    CliImplicitFlag,
     PydanticBaseSettingsSource,
     SettingsConfigDict,
 )
 
-from .base import Config, Configurable
+from .base import Config, Configurable, _reduce_to_config
 from .logging import DEFAULT_LOG_CONFIG, LogConfig
+from .profiling import (
+    Instrumentation,
+    StartupProfiler,
+    measure,
+    profile_init_sources,
+    use_profiler,
+)
+from .reload import ConfigWatcher
+from .snapshot import read_snapshot, write_snapshot
 from .sources import CliConfigSettingsSource
 
 __all__ = [
     "Tool",
 ]
 
+#: Command-line options enabling the startup profile, checked before parsing
+_PROFILE_OPTIONS = ("--profile-startup", "--profile_startup")
+
 
 class Tool(Configurable):
     """Base class for command-line tools."""
 
     class __config__(Config):
         config_files: list[FilePath] | None = Field(
-            None, alias=AliasChoices("c", "config")
+            None,
+            validation_alias=AliasChoices("c", "config"),
+            serialization_alias="config",
         )
         log_config: LogConfig = LogConfig()
+        profile_startup: CliImplicitFlag[bool] = Field(
+            False,
+            description="Report wall time and memory of config loading and tool phases",
+        )
+        profile_output: Path | None = Field(
+            None,
+            description="Write the startup profile as JSON to this path instead of the log",
+        )
+        instrument: CliImplicitFlag[bool] = Field(
+            False,
+            description="Log calls and time of the methods of all components",
+        )
+        instrument_memory: CliImplicitFlag[bool] = Field(
+            False,
+            description="Trace the peak memory of instrumented methods,"
+            " this slows down allocations considerably",
+        )
+        watch_config: CliImplicitFlag[bool] = Field(
+            False,
+            description="Reload changed config files while the tool is running",
+        )
+        n_workers: int = Field(
+            1,
+            ge=1,
+            description="Number of worker processes used to process items",
+        )
 
         model_config = SettingsConfigDict(
             env_prefix="CTAPIPE_",
@@ -35,6 +85,11 @@ class Tool(Configurable):
             cli_hide_none_type=True,
             cli_shortcuts={
                 "log_config.root.level": "log-level",
+                "profile_startup": "profile-startup",
+                "profile_output": "profile-output",
+                "instrument_memory": "instrument-memory",
+                "n_workers": "n-workers",
+                "watch_config": "watch-config",
             },
         )
 
@@ -58,6 +113,79 @@ class Tool(Configurable):
                 CliConfigSettingsSource(settings_cls=settings_cls),
             )
 
+        # The following private methods of pydantic-settings are only extended
+        # for profiling. Arguments and results are passed on as they are,
+        # so changes of their signature do not break creating tools.
+        @classmethod
+        def _settings_init_sources(cls, *args, **kwargs):
+            # includes setting up the command-line parser
+            with measure("source setup"):
+                result = super()._settings_init_sources(*args, **kwargs)
+            return profile_init_sources(result)
+
+        @classmethod
+        def _settings_build_values(cls, *args, **kwargs):
+            with measure("sources"):
+                return super()._settings_build_values(*args, **kwargs)
+
+    def __init__(
+        self,
+        config: Config | None = None,
+        parent: Configurable | None = None,
+        name: str | None = None,
+    ):
+        # config loading has to be profiled before the option is parsed,
+        # only possible if the config is loaded from the command line
+        profiler = None
+        cli_args = self.__config__.model_config.get("cli_parse_args")
+        if config is None and cli_args:
+            args = sys.argv[1:] if cli_args is True else cli_args
+            if any(arg.startswith(_PROFILE_OPTIONS) for arg in args):
+                profiler = StartupProfiler()
+
+        with use_profiler(profiler), measure("config"):
+            super().__init__(config=config, parent=parent, name=name)
+
+        if profiler is not None:
+            profiler.add_remainder("validation")
+        elif self.config.profile_startup:
+            profiler = StartupProfiler()
+
+        if profiler is not None and not self.config.profile_startup:
+            profiler.stop()
+            profiler = None
+
+        self.profiler: StartupProfiler | None = profiler
+
+        if self.config.instrument:
+            self._instrumentation = Instrumentation(
+                trace_memory=self.config.instrument_memory
+            )
+            self._instrumentation.instrument(self)
+
+    def __reduce__(self):
+        """Pickle only the validated config as JSON, see `Configurable.__reduce__`.
+
+        Config sources are not considered when unpickling, in particular the
+        command-line arguments of the unpickling process are not parsed.
+        """
+        return _reduce_to_config(self, _tool_from_config_json)
+
+    @classmethod
+    def from_config_snapshot(cls, path: str | PathLike, **kwargs) -> Self:
+        """Create a tool from a config snapshot written by `write_config_snapshot`.
+
+        Config sources are not considered and, if the config classes did not change
+        since writing the snapshot, the config is not validated again.
+        Changes are detected using `~pydantic_configtree.snapshot.schema_hash`,
+        which does not cover functions only called indirectly by validators.
+        """
+        return cls(config=read_snapshot(cls.__config__, path), **kwargs)
+
+    def write_config_snapshot(self, path: str | PathLike):
+        """Write the resolved and validated config of this tool to a snapshot file."""
+        write_snapshot(self.config, path)
+
     def setup(self):
         """Perform setup of the CLI tool."""
 
@@ -68,6 +196,73 @@ class Tool(Configurable):
     def finish(self):
         """Run cleanup / exit steps."""
 
+    def config_changed(self, old_config: Config, changed: list[tuple[str, ...]]):
+        """Apply a reloaded logging config, see `Configurable.config_changed`."""
+        if any(path[:1] in {(), ("log_config",)} for path in changed):
+            self._setup_logging()
+
+    def setup_worker(self):
+        """Prepare a copy of the tool in a worker process of `process_items`.
+
+        By default, this calls `setup`. Override it if `setup` does more than creating
+        the components needed in `process_item`, e.g. opening output files.
+        """
+        self.setup()
+
+    def process_item(self, item):
+        """Process a single work item, called by `process_items`."""
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not implement process_item"
+        )
+
+    def process_items(self, items: Iterable, chunksize: int = 1) -> Iterator:
+        """Call `process_item` for each item, in ``n_workers`` processes if more than one.
+
+        Each worker process gets a copy of the tool, created from its config,
+        and calls `setup_worker` once before processing its first item.
+        The tool, and thus all arguments of ``process_item``, must be importable
+        from the worker processes, i.e. must not be defined locally.
+
+        Items are sent to the workers in chunks of ``chunksize`` items and at most
+        two chunks per worker are submitted ahead of the results consumed,
+        so ``items`` can be a lazy or very large iterable.
+
+        Parameters
+        ----------
+        items : Iterable
+            The items to process.
+        chunksize : int
+            Number of items sent to a worker at once.
+
+        Yields
+        ------
+        result
+            Results of `process_item`, in the order of ``items``.
+        """
+        if self.config.n_workers == 1:
+            yield from map(self.process_item, items)
+            return
+
+        items = iter(items)
+        max_pending = 2 * self.config.n_workers
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=self.config.n_workers,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as pool:
+            try:
+                while chunk := list(islice(items, chunksize)):
+                    if len(pending) == max_pending:
+                        yield from pending.popleft().result()
+                    pending.append(pool.submit(_process_chunk, chunk))
+
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def _setup_logging(self):
         # we always make a basic setup with the default logging config
         logging.config.dictConfig(DEFAULT_LOG_CONFIG.model_dump())
@@ -81,8 +276,61 @@ class Tool(Configurable):
 
     def start(self):
         """Entry point for pydantic_settings.CliApp."""
-        self._setup_logging()
+        with use_profiler(self.profiler):
+            with measure("logging setup"):
+                self._setup_logging()
 
-        self.setup()
-        self.run()
-        self.finish()
+            with measure("setup"):
+                self.setup()
+            watcher = ConfigWatcher(self) if self.config.watch_config else None
+            if watcher is not None:
+                watcher.start()
+            try:
+                with measure("run"):
+                    self.run()
+            finally:
+                if watcher is not None:
+                    watcher.stop()
+            with measure("finish"):
+                self.finish()
+
+        if self.profiler is not None:
+            self._report_profile()
+
+        if self._instrumentation is not None:
+            self._report_instrumentation()
+
+    def _report_instrumentation(self):
+        self._instrumentation.stop()
+        self.log.info(
+            "Component instrumentation:\n%s", self._instrumentation.format_tree()
+        )
+
+    def _report_profile(self):
+        self.profiler.stop()
+        if self.config.profile_output is not None:
+            self.profiler.write_json(self.config.profile_output)
+            self.log.info("Wrote startup profile to %s", self.config.profile_output)
+        else:
+            self.log.info("Startup profile:\n%s", self.profiler.format_table())
+
+
+def _tool_from_config_json(cls_name, config_json, name):
+    tool_cls = Tool._find_subclass(cls_name)
+    config = tool_cls.__config__(_cli_parse_args=False, **from_json(config_json))
+    return tool_cls(config=config, name=name)
+
+
+#: The tool in a worker process of Tool.process_items
+_worker_tool = None
+
+
+def _init_worker(tool):
+    global _worker_tool
+    tool._setup_logging()
+    tool.setup_worker()
+    _worker_tool = tool
+
+
+def _process_chunk(chunk):
+    return [_worker_tool.process_item(item) for item in chunk]
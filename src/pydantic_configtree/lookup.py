@@ -1,7 +1,12 @@
 """A lookup table for configuration values."""
 
-from collections.abc import Sequence
-from fnmatch import fnmatch
+import re
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from collections.abc import Callable, Sequence
+from fnmatch import translate
+from os.path import normcase
 from typing import Any, Generic, TypeVar, get_args, get_origin
 
 from pydantic import GetCoreSchemaHandler
@@ -9,6 +14,8 @@ from pydantic_core import CoreSchema, SchemaValidator, core_schema
 
 __all__ = [
     "Lookup",
+    "LookupCacheInfo",
+    "MaterializedLookup",
 ]
 
 ItemType = TypeVar("T")
@@ -20,11 +27,96 @@ class NotFoundType:
 
 NotFound = NotFoundType()
 
+#: Statistics of the `Lookup` result cache, see `Lookup.cache_info`.
+LookupCacheInfo = namedtuple(
+    "LookupCacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
 
-def _matches(definition, value):
-    if isinstance(definition, str):
-        return fnmatch(value, definition)
-    return value == definition
+
+def _is_pattern(definition):
+    return isinstance(definition, str) and any(c in definition for c in "*?[")
+
+
+class _KeyIndex:
+    """Precompiled index over the definitions of a single index key.
+
+    Exact definitions (all non-str values and str values without glob characters)
+    are stored in a dict, glob patterns are compiled into a single regular expression.
+    Each definition has an integer rank, the position in the lookup table,
+    and a higher rank takes precedence.
+    """
+
+    __slots__ = ("exact", "pattern", "pattern_values")
+
+    def __init__(self, definitions):
+        self.exact = {}
+        patterns = []
+
+        for rank, (definition, config_value) in enumerate(definitions.items()):
+            if isinstance(definition, str):
+                # same normalization as fnmatch.fnmatch
+                definition = normcase(definition)
+                if _is_pattern(definition):
+                    patterns.append((rank, definition, config_value))
+                    continue
+            self.exact[definition] = (rank, config_value)
+
+        self.pattern = None
+        self.pattern_values = {}
+        if patterns:
+            # highest rank first, so the first matching alternative wins
+            patterns.sort(key=lambda p: p[0], reverse=True)
+            groups = []
+            for rank, definition, config_value in patterns:
+                group = f"p{rank}"
+                self.pattern_values[group] = (rank, config_value)
+                groups.append(f"(?P<{group}>{translate(definition)})")
+            self.pattern = re.compile("|".join(groups))
+
+    def match(self, index_value):
+        """Return (rank, config_value) of the highest ranked match or None."""
+        if not isinstance(index_value, str):
+            return self.exact.get(index_value)
+
+        index_value = normcase(index_value)
+        found = self.exact.get(index_value)
+
+        if self.pattern is not None:
+            match = self.pattern.fullmatch(index_value)
+            if match is not None:
+                pattern_found = self.pattern_values[match.lastgroup]
+                if found is None or pattern_found[0] > found[0]:
+                    return pattern_found
+
+        return found
+
+
+def _to_array(values):
+    import numpy as np
+
+    # np.asarray would convert scalars of different types, e.g. ints to strings
+    types = {type(value) for value in values}
+    if len(types) == 1 and all(np.isscalar(value) for value in values):
+        return np.asarray(values)
+
+    # astropy is an optional dependency, if it is not imported yet,
+    # values cannot be quantities
+    units = sys.modules.get("astropy.units")
+    if units is not None and all(
+        isinstance(value, units.Quantity) and value.isscalar for value in values
+    ):
+        try:
+            # converts all values to the unit of the first one
+            return units.Quantity(values)
+        except ValueError:
+            # incompatible units
+            pass
+
+    # fill element-wise, so that sequence values are not interpreted as dimensions
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
 
 
 class Lookup(Generic[ItemType]):
@@ -32,11 +124,32 @@ class Lookup(Generic[ItemType]):
 
     The table is using a hierarchical index of arbitrary keys.
 
-    Later keys take higher precedence.
+    Index keys defined later in the table take higher precedence, independent
+    of the order in which they are passed to `get`.
+    For the same index key, later definitions take higher precedence.
 
     str index values are matched using fnmatch, all other types are compared
     for equality.
 
+    Results of `get` are cached, the cache can be bounded to a maximum size
+    using ``cache_size``. In that case, the least recently used results are evicted.
+
+    A frozen lookup can be used from multiple threads concurrently.
+    Its entries are stored as tuple and reading from the cache does not take a lock,
+    only storing results in a bounded cache does. Cache hits do not update the order
+    of the cached results, so a bounded cache evicts the oldest results first.
+    The cache statistics are not synchronized and only approximate with concurrent use.
+
+    Parameters
+    ----------
+    entries : Sequence[tuple[str, Any, ItemType]]
+        The lookup table entries as (index_key, index_value, config_value) tuples.
+    cache_size : int | None
+        Maximum number of cached lookup results. ``None`` means unbounded,
+        ``0`` disables caching.
+    frozen : bool
+        Create an immutable lookup that is safe to use from multiple threads.
+
     Examples
     --------
     >>> lookup = Lookup([("type", "*", 1), ("type", "LST", 2), ("id", 1, 3)])
@@ -46,10 +159,29 @@ class Lookup(Generic[ItemType]):
     2
     >>> lookup.get(type="MST", id=5)
     1
+    >>> lookup.get(type="LST", id=1)
+    3
+    >>> lookup.cache_info()
+    LookupCacheInfo(hits=1, misses=3, evictions=0, maxsize=None, currsize=3)
     """
 
-    def __init__(self, entries: Sequence[tuple[str, Any, ItemType]]):
-        self.entries: list[tuple[str, Any, ItemType]] = list(entries)
+    def __init__(
+        self,
+        entries: Sequence[tuple[str, Any, ItemType]],
+        cache_size: int | None = None,
+        frozen: bool = False,
+    ):
+        if cache_size is not None and cache_size < 0:
+            raise ValueError(f"cache_size must be >= 0 or None, got {cache_size}")
+
+        if frozen:
+            self.entries: tuple[tuple[str, Any, ItemType], ...] = tuple(
+                tuple(entry) for entry in entries
+            )
+        else:
+            self.entries: list[tuple[str, Any, ItemType]] = list(entries)
+        self.cache_size = cache_size
+        self.frozen = frozen
 
         self._lookup_table = {}
         for index_key, index_value, config_value in self.entries:
@@ -58,38 +190,274 @@ class Lookup(Generic[ItemType]):
 
             self._lookup_table[index_key][index_value] = config_value
 
-        self._cache = {}
+        # index keys in order of precedence, this defines the layout of cache keys
+        self._keys = tuple(self._lookup_table)
+        self._indices = tuple(
+            _KeyIndex(definitions) for definitions in self._lookup_table.values()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if frozen:
+            # insertion ordered dict, without reordering on reads
+            self._cache = {}
+            self._lock = threading.Lock()
+            self._get = self._get_frozen
+        else:
+            self._cache = OrderedDict() if cache_size else {}
 
     def get(self, **kwargs) -> ItemType:
         """Look up a config value given an index."""
-        # make kwargs dict contents hashable
-        index_keys = tuple(kwargs.keys())
-        index_values = tuple(kwargs.values())
-        cache_key = index_keys, index_values
+        # canonical, hashable cache key independent of the order of kwargs,
+        # index keys not present in the table do not influence the result
+        return self._get(tuple([kwargs.get(key, NotFound) for key in self._keys]))
+
+    def bind(self, *index_keys: str) -> Callable[..., ItemType]:
+        """Return a function looking up config values by positional index values.
+
+        This avoids building the keyword arguments for each call of `get`
+        in hot loops.
+
+        Examples
+        --------
+        >>> lookup = Lookup([("type", "*", 1), ("type", "LST", 2), ("id", 1, 3)])
+        >>> get = lookup.bind("id", "type")
+        >>> get(1, "MST")
+        3
+        >>> get(2, "LST")
+        2
+        """
+        if len(set(index_keys)) != len(index_keys):
+            raise ValueError(f"Duplicated index keys in {index_keys}")
+
+        n_keys = len(index_keys)
+        positions = [
+            index_keys.index(key) if key in index_keys else None for key in self._keys
+        ]
+        _get = self._get
+
+        if positions == list(range(n_keys)):
+            # arguments are already in canonical order
+            def lookup(*index_values):
+                if len(index_values) != n_keys:
+                    raise TypeError(f"Expected {n_keys} index values")
+                return _get(index_values)
+
+        else:
+
+            def lookup(*index_values):
+                if len(index_values) != n_keys:
+                    raise TypeError(f"Expected {n_keys} index values")
+                return _get(
+                    tuple(
+                        [
+                            NotFound if pos is None else index_values[pos]
+                            for pos in positions
+                        ]
+                    )
+                )
+
+        return lookup
+
+    def get_many(self, **kwargs):
+        """Look up config values for arrays of index values.
+
+        The index values are broadcast against each other and each distinct
+        combination of index values is only looked up once.
+        Requires numpy.
+
+        Returns
+        -------
+        values : numpy.ndarray
+            Array of the broadcast shape of the inputs. An object array is returned
+            if the config values are not scalars or of different types.
+
+        Examples
+        --------
+        >>> lookup = Lookup([("type", "*", 1), ("type", "LST", 2), ("id", 1, 3)])
+        >>> lookup.get_many(type=["LST", "MST", "LST"], id=[1, 2, 3])
+        array([3, 1, 2])
+        >>> lookup.get_many(type="LST", id=[[1, 2], [3, 4]])
+        array([[3, 2],
+               [2, 2]])
+        """
+        import numpy as np
+
+        keys = [key for key in self._keys if key in kwargs]
+        if len(keys) == 0:
+            raise KeyError(f"No configuration found for lookup index {kwargs}")
 
+        arrays = np.broadcast_arrays(*(np.asarray(kwargs[key]) for key in keys))
+        shape = arrays[0].shape
+        if arrays[0].size == 0:
+            # nothing to look up, use the dtype of the values in the table
+            return _to_array([value for _, _, value in self.entries])[:0].reshape(shape)
+
+        # integer codes of the unique values of each index key,
+        # combined into a single integer code per element
+        uniques = []
+        codes = []
+        for array in arrays:
+            unique, inverse = np.unique(array.ravel(), return_inverse=True)
+            uniques.append(unique.tolist())
+            codes.append(inverse)
+
+        dims = tuple(len(unique) for unique in uniques)
+        combined = np.ravel_multi_index(codes, dims)
+        combinations, inverse = np.unique(combined, return_inverse=True)
+        combination_codes = np.unravel_index(combinations, dims)
+
+        positions = [keys.index(key) if key in keys else None for key in self._keys]
+        results = []
+        for i in range(len(combinations)):
+            index_values = [
+                unique[code[i]] for unique, code in zip(uniques, combination_codes)
+            ]
+            cache_key = tuple(
+                [NotFound if pos is None else index_values[pos] for pos in positions]
+            )
+            results.append(self._get(cache_key))
+
+        return _to_array(results)[inverse].reshape(shape)
+
+    def materialize(self, by: str | None = None, **domain) -> "MaterializedLookup":
+        """Precompute the config values for all index values of a known domain.
+
+        Requires numpy.
+
+        Parameters
+        ----------
+        by : str | None
+            Name of an index key with unique, non-negative integer values, e.g. ``"id"``.
+            If given, the result also supports array indexing by these values.
+        **domain
+            Sequences of index values, broadcast against each other like for `get_many`.
+            Each element defines one index of the domain.
+
+        Returns
+        -------
+        MaterializedLookup
+            Frozen table containing the config values for all indices of the domain.
+
+        Examples
+        --------
+        >>> lookup = Lookup([("type", "*", 1), ("type", "LST", 2), ("id", 1, 3)])
+        >>> table = lookup.materialize(id=[1, 2, 5], type=["LST", "LST", "MST"], by="id")
+        >>> print(table.get(id=2, type="LST"))
+        2
+        >>> table[[5, 1]]
+        array([1, 3])
+        """
+        import numpy as np
+
+        keys = tuple(domain)
+        columns = np.broadcast_arrays(*(np.asarray(domain[key]) for key in keys))
+        index = list(zip(*(column.ravel().tolist() for column in columns)))
+        values = self.get_many(**domain).ravel()
+        return MaterializedLookup(keys, index, values, by=by)
+
+    def _get(self, cache_key):
         # distinguish None found in cache from key not found
         if (value := self._cache.get(cache_key, NotFound)) is not NotFound:
+            self._hits += 1
+            if self.cache_size:
+                self._cache.move_to_end(cache_key)
             return value
 
+        self._misses += 1
+        value = self._resolve(cache_key)
+
+        if self.cache_size is None:
+            self._cache[cache_key] = value
+        elif self.cache_size > 0:
+            self._cache[cache_key] = value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+
+        return value
+
+    def _get_frozen(self, cache_key):
+        # reading the cache is atomic, concurrent misses of the same key
+        # compute and store the same value
+        if (value := self._cache.get(cache_key, NotFound)) is not NotFound:
+            self._hits += 1
+            return value
+
+        self._misses += 1
+        value = self._resolve(cache_key)
+
+        if self.cache_size is None:
+            self._cache[cache_key] = value
+        elif self.cache_size > 0:
+            with self._lock:
+                self._cache[cache_key] = value
+                while len(self._cache) > self.cache_size:
+                    del self._cache[next(iter(self._cache))]
+                    self._evictions += 1
+
+        return value
+
+    def _resolve(self, cache_key):
         value = NotFound
 
-        for index_key, index_value in kwargs.items():
-            if (lookup := self._lookup_table.get(index_key)) is not None:
-                for definition, config_value in lookup.items():
-                    if _matches(definition, index_value):
-                        value = config_value
+        for index, index_value in zip(self._indices, cache_key):
+            if index_value is not NotFound:
+                if (match := index.match(index_value)) is not None:
+                    value = match[1]
 
         if value is NotFound:
-            raise KeyError(f"No configuration found for lookup index {kwargs}")
+            index = {
+                key: index_value
+                for key, index_value in zip(self._keys, cache_key)
+                if index_value is not NotFound
+            }
+            raise KeyError(f"No configuration found for lookup index {index}")
 
-        self._cache[cache_key] = value
         return value
 
+    def cache_info(self) -> LookupCacheInfo:
+        """Return statistics of the lookup result cache."""
+        return LookupCacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            maxsize=self.cache_size,
+            currsize=len(self._cache),
+        )
+
+    def cache_clear(self):
+        """Clear the lookup result cache and its statistics."""
+        if self.frozen:
+            # replace instead of clearing, concurrent readers keep a consistent cache
+            with self._lock:
+                self._cache = {}
+        else:
+            self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __reduce__(self):  # noqa: D105
+        # only the definition is pickled, index and cache are rebuilt
+        return Lookup, (self.entries, self.cache_size, self.frozen)
+
     def __repr__(self):  # noqa: D105
-        return f"Lookup({self.entries})"
+        options = ""
+        if self.cache_size is not None:
+            options += f", cache_size={self.cache_size}"
+        if self.frozen:
+            options += ", frozen=True"
+        return f"Lookup({list(self.entries)}{options})"
 
     def __eq__(self, other):  # noqa: D105
-        return isinstance(other, Lookup) and self.entries == other.entries
+        return (
+            isinstance(other, Lookup)
+            and list(self.entries) == list(other.entries)
+            and self.cache_size == other.cache_size
+            and self.frozen == other.frozen
+        )
 
     # Required for Pydantic to parse from JSON or dict
     @classmethod
@@ -105,17 +473,61 @@ class Lookup(Generic[ItemType]):
 
         entries_schema = handler.generate_schema(list[tuple[str, Any, item_type]])
 
+        # a lookup can either be given as list of entries or as a mapping
+        # that additionally allows to configure the cache
+        mapping_schema = core_schema.typed_dict_schema(
+            {
+                "entries": core_schema.typed_dict_field(entries_schema),
+                "cache_size": core_schema.typed_dict_field(
+                    core_schema.nullable_schema(core_schema.int_schema(ge=0)),
+                    required=False,
+                ),
+                "frozen": core_schema.typed_dict_field(
+                    core_schema.bool_schema(),
+                    required=False,
+                ),
+            }
+        )
+        input_schema = core_schema.union_schema([entries_schema, mapping_schema])
+
         type_schema = core_schema.is_instance_schema(cls)
 
+        def from_validated(value):
+            if isinstance(value, dict):
+                return Lookup(
+                    value["entries"],
+                    cache_size=value.get("cache_size"),
+                    frozen=value.get("frozen", False),
+                )
+            return Lookup(value)
+
+        # compiled on first use and then reused for all validations with this schema.
+        # Not shared between models, as the entries schema depends on the model config.
+        validator = None
+
         def validate(value):
-            if isinstance(value, Lookup):
-                entries = value.entries
-            else:
-                entries = value
+            nonlocal validator
 
-            validator = SchemaValidator(entries_schema)
-            entries = validator.validate_python(entries)
-            return Lookup(entries)
+            if isinstance(value, Lookup):
+                value = {
+                    "entries": list(value.entries),
+                    "cache_size": value.cache_size,
+                    "frozen": value.frozen,
+                }
+
+            if validator is None:
+                validator = SchemaValidator(input_schema)
+            return from_validated(validator.validate_python(value))
+
+        def serialize(value):
+            entries = list(value.entries)
+            if value.cache_size is None and not value.frozen:
+                return entries
+
+            options = {"entries": entries, "cache_size": value.cache_size}
+            if value.frozen:
+                options["frozen"] = True
+            return options
 
         python_schema = core_schema.no_info_before_validator_function(
             validate,
@@ -124,9 +536,9 @@ class Lookup(Generic[ItemType]):
 
         json_schema = core_schema.chain_schema(
             [
-                entries_schema,
+                input_schema,
                 core_schema.no_info_before_validator_function(
-                    lambda entries: Lookup(entries), type_schema
+                    from_validated, type_schema
                 ),
             ]
         )
@@ -135,7 +547,82 @@ class Lookup(Generic[ItemType]):
             json_schema=json_schema,
             python_schema=python_schema,
             serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda v: v.entries,
-                return_schema=entries_schema,
+                serialize,
+                return_schema=input_schema,
             ),
         )
+
+
+class MaterializedLookup:
+    """A frozen lookup table with precomputed config values.
+
+    Created by `Lookup.materialize`, see there.
+    Reads do not need any pattern matching or cache bookkeeping.
+
+    Attributes
+    ----------
+    keys : tuple[str, ...]
+        The index keys of the domain.
+    values : numpy.ndarray
+        Read-only array of the config values, in the order of the domain.
+    by : str | None
+        The index key used for array indexing, if any.
+    """
+
+    __slots__ = ("keys", "values", "by", "_rows", "_dense", "_valid")
+
+    def __init__(self, keys, index, values, by=None):
+        import numpy as np
+
+        self.keys = keys
+        self.values = values
+        self.values.flags.writeable = False
+        self.by = by
+        self._rows = {idx: row for row, idx in enumerate(index)}
+        self._dense = None
+        self._valid = None
+
+        if by is not None:
+            if by not in keys:
+                raise ValueError(f"by={by!r} is not one of the index keys {keys}")
+
+            ids = np.array([idx[keys.index(by)] for idx in index])
+            if ids.dtype.kind not in "ui" or np.any(ids < 0):
+                raise ValueError(f"Values of {by!r} must be non-negative integers")
+            if len(np.unique(ids)) != len(ids):
+                raise ValueError(f"Values of {by!r} must be unique")
+
+            size = ids.max() + 1 if len(ids) > 0 else 0
+            self._dense = np.zeros_like(values, shape=(size,))
+            self._dense[ids] = values
+            self._dense.flags.writeable = False
+            self._valid = np.zeros(size, dtype=bool)
+            self._valid[ids] = True
+
+    def get(self, **kwargs):
+        """Get the config value for an index of the domain."""
+        try:
+            row = self._rows[tuple([kwargs[key] for key in self.keys])]
+        except KeyError:
+            raise KeyError(f"Index {kwargs} is not part of the domain") from None
+        return self.values[row]
+
+    def __getitem__(self, index):
+        """Get config values by (arrays of) values of the index key ``by``."""
+        import numpy as np
+
+        if self._dense is None:
+            raise TypeError("Indexing requires a table materialized with by=<key>")
+
+        index = np.asarray(index)
+        if np.any(index < 0) or np.any(index >= len(self._valid)):
+            raise KeyError(f"{self.by}={index} is not part of the domain")
+        if not np.all(self._valid[index]):
+            raise KeyError(f"{self.by}={index} is not part of the domain")
+        return self._dense[index]
+
+    def __len__(self):  # noqa: D105
+        return len(self._rows)
+
+    def __repr__(self):  # noqa: D105
+        return f"MaterializedLookup(keys={self.keys}, size={len(self)})"
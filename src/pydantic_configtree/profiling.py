@@ -0,0 +1,444 @@
+"""Profiling of the startup phases of tools and instrumentation of components."""
+
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from os import PathLike
+
+from pydantic_settings import PydanticBaseSettingsSource
+from pydantic_settings.sources import DefaultSettingsSource
+
+__all__ = [
+    "Instrumentation",
+    "PhaseRecord",
+    "StartupProfiler",
+    "current_profiler",
+    "measure",
+    "profile_sources",
+    "use_profiler",
+]
+
+#: The profiler used by `measure`, set by `use_profiler`
+_current_profiler = ContextVar("_current_profiler", default=None)
+
+#: Wall time in seconds and memory in bytes of a measured phase.
+#: memory is the net change of the memory traced by tracemalloc,
+#: peak_memory the maximum increase over the start of the phase.
+PhaseRecord = namedtuple(
+    "PhaseRecord", ["name", "depth", "wall_time", "memory", "peak_memory"]
+)
+
+
+class StartupProfiler:
+    """Measures wall time and allocated memory of nested phases.
+
+    Memory is traced using `tracemalloc`, which is started when creating the profiler
+    if it is not already tracing and stopped again by `stop`.
+
+    Examples
+    --------
+    >>> profiler = StartupProfiler()
+    >>> with profiler.measure("outer"):
+    ...     with profiler.measure("inner"):
+    ...         data = list(range(1000))
+    >>> profiler.stop()
+    >>> [(record.name, record.depth) for record in profiler.records]
+    [('outer', 0), ('inner', 1)]
+    """
+
+    def __init__(self):
+        self.records: list[PhaseRecord] = []
+        # for each running phase: index of its record, start time, start memory, peak
+        self._stack = []
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """Stop tracing memory, if tracing was started by this profiler."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @staticmethod
+    def _traced_memory():
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()
+        return 0, 0
+
+    @contextmanager
+    def measure(self, name: str):
+        """Measure the phase ``name``, phases measured inside are recorded as sub-phases."""
+        # the peak is reset for each phase, so keep track of the peak of the parent
+        current, peak = self._traced_memory()
+        if self._stack:
+            self._stack[-1][3] = max(self._stack[-1][3], peak)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+        # insert a placeholder so that phases are listed before their sub-phases
+        index = len(self.records)
+        self.records.append(None)
+        self._stack.append([index, time.perf_counter(), current, current])
+        try:
+            yield
+        finally:
+            stop = time.perf_counter()
+            _, start, start_memory, max_peak = self._stack.pop()
+            current, peak = self._traced_memory()
+            peak = max(peak, max_peak)
+
+            self.records[index] = PhaseRecord(
+                name=name,
+                depth=len(self._stack),
+                wall_time=stop - start,
+                memory=current - start_memory,
+                peak_memory=peak - start_memory,
+            )
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+
+    def add_remainder(self, name: str):
+        """Add the part of the last finished phase not covered by its sub-phases as sub-phase.
+
+        This is used for phases that cannot be measured directly,
+        e.g. the validation of a config after its sources were loaded.
+        The peak memory of the remainder is the one of the finished phase.
+        """
+        depth = len(self._stack)
+        parent_index = max(
+            i
+            for i, record in enumerate(self.records)
+            if record is not None and record.depth == depth
+        )
+        parent = self.records[parent_index]
+
+        children = [
+            record
+            for record in self.records[parent_index + 1 :]
+            if record.depth == depth + 1
+        ]
+        self.records.append(
+            PhaseRecord(
+                name=name,
+                depth=depth + 1,
+                wall_time=parent.wall_time - sum(r.wall_time for r in children),
+                memory=parent.memory - sum(r.memory for r in children),
+                peak_memory=parent.peak_memory,
+            )
+        )
+
+    def to_dict(self) -> dict:
+        """Return the records as JSON compatible dict."""
+        return {"phases": [record._asdict() for record in self.records]}
+
+    def write_json(self, path: str | PathLike):
+        """Write the records to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format_table(self) -> str:
+        """Format the records as text table."""
+        names = ["  " * record.depth + record.name for record in self.records]
+        width = max([len("phase"), *map(len, names)])
+
+        lines = [
+            f"{'phase':<{width}} {'wall [ms]':>10} {'memory [KiB]':>13} {'peak [KiB]':>11}"
+        ]
+        for name, record in zip(names, self.records):
+            lines.append(
+                f"{name:<{width}} {record.wall_time * 1e3:>10.2f}"
+                f" {record.memory / 1024:>13.1f} {record.peak_memory / 1024:>11.1f}"
+            )
+        return "\n".join(lines)
+
+
+def current_profiler() -> StartupProfiler | None:
+    """Get the profiler set by `use_profiler`."""
+    return _current_profiler.get()
+
+
+@contextmanager
+def use_profiler(profiler: StartupProfiler | None):
+    """Use ``profiler`` for all calls to `measure` in this context."""
+    token = _current_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current_profiler.reset(token)
+
+
+def measure(name: str):
+    """Measure phase ``name`` using the current profiler, does nothing without profiler."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return nullcontext()
+    return profiler.measure(name)
+
+
+class _ProfiledSource(PydanticBaseSettingsSource):
+    """Wrapper around a settings source, measuring the time to load its values."""
+
+    def __init__(self, source: PydanticBaseSettingsSource):
+        super().__init__(source.settings_cls)
+        self.source = source
+        # used by pydantic-settings to name the values of each source
+        self.__name__ = getattr(source, "__name__", type(source).__name__)
+
+    def _set_current_state(self, state):
+        self.source._set_current_state(state)
+
+    def _set_settings_sources_data(self, states):
+        self.source._set_settings_sources_data(states)
+
+    def get_field_value(self, field, field_name):
+        return self.source.get_field_value(field, field_name)
+
+    def __call__(self):
+        with measure(f"source {self.__name__}"):
+            return self.source()
+
+
+#: Private methods of pydantic-settings called on sources, forwarded by _ProfiledSource
+_SOURCE_HOOKS = ("_set_current_state", "_set_settings_sources_data")
+
+
+def profile_sources(sources):
+    """Wrap settings sources to measure them, if a profiler is in use.
+
+    The sources are returned unchanged if the pydantic-settings version in use
+    does not provide the private methods forwarded by the wrapper.
+    """
+    if _current_profiler.get() is None:
+        return sources
+
+    if not all(hasattr(PydanticBaseSettingsSource, hook) for hook in _SOURCE_HOOKS):
+        return sources
+
+    # the default source is identified by type and holds the state of all sources
+    return tuple(
+        _ProfiledSource(source)
+        if isinstance(source, PydanticBaseSettingsSource)
+        and not isinstance(source, DefaultSettingsSource)
+        else source
+        for source in sources
+    )
+
+
+def profile_init_sources(result):
+    """Wrap the sources returned by ``BaseSettings._settings_init_sources``.
+
+    ``_settings_init_sources`` is private to pydantic-settings,
+    results of an unknown structure are returned unchanged.
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], tuple):
+        sources, init_kwargs = result
+        return profile_sources(sources), init_kwargs
+    return result
+
+
+class _MethodStats:
+    __slots__ = ("calls", "cumulative_time", "self_time", "peak_memory")
+
+    def __init__(self):
+        self.calls = 0
+        self.cumulative_time = 0.0
+        self.self_time = 0.0
+        self.peak_memory = 0
+
+
+class Instrumentation:
+    """Collects call counts, time and peak memory of the methods of Configurables.
+
+    Configurables created with a ``parent`` using instrumentation are instrumented
+    as well, so enabling it for the root of a tree, e.g. a `~pydantic_configtree.Tool`,
+    instruments the whole tree. Without instrumentation, methods are not wrapped
+    and there is no overhead.
+
+    Public methods are replaced by timing wrappers on each instrumented instance,
+    methods of the `~pydantic_configtree.Configurable` and `~pydantic_configtree.Tool`
+    base classes are not instrumented.
+    Self time excludes the time spent in instrumented methods called inside a method,
+    the total of a component is the self time of all methods of it and its children.
+
+    Parameters
+    ----------
+    trace_memory : bool
+        Trace the peak memory of each method using `tracemalloc`.
+        Disabled by default, as it slows down allocations considerably.
+        While a `StartupProfiler` is active, the peak memory of methods is not traced,
+        as resetting the peak would corrupt the peak memory of the profiled phases.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        #: Stats by path of the component and method name
+        self.stats: dict[tuple[str, ...], dict[str, _MethodStats]] = {}
+        #: Class name of each component by path
+        self.components: dict[tuple[str, ...], str] = {}
+        self._local = threading.local()
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """Stop tracing memory, if tracing was started by this instance."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def instrument(self, component):
+        """Replace the public methods of ``component`` by timing wrappers."""
+        path = []
+        node = component
+        while node is not None:
+            path.append(node.name)
+            node = node.parent
+        path = tuple(reversed(path))
+
+        self.components[path] = type(component).__name__
+        stats = self.stats.setdefault(path, {})
+
+        seen = set()
+        for cls in type(component).__mro__:
+            if cls.__module__ in _NOT_INSTRUMENTED_MODULES or cls is object:
+                continue
+
+            for name, attr in vars(cls).items():
+                if name.startswith("_") or name in seen:
+                    continue
+                seen.add(name)
+                if not inspect.isfunction(attr):
+                    continue
+
+                method = getattr(component, name)
+                method_stats = stats.setdefault(name, _MethodStats())
+                setattr(component, name, self._wrap(method, method_stats))
+
+    def _wrap(self, method, stats):
+        local = self._local
+        trace_memory = self.trace_memory
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+
+            # the startup profiler relies on the peak not being reset in its phases
+            tracing = (
+                trace_memory
+                and tracemalloc.is_tracing()
+                and _current_profiler.get() is None
+            )
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                if stack:
+                    stack[-1][2] = max(stack[-1][2], peak)
+                tracemalloc.reset_peak()
+            else:
+                current = 0
+
+            # time spent in instrumented calls inside, peak memory
+            frame = [0.0, current, current]
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                stack.pop()
+
+                stats.calls += 1
+                stats.cumulative_time += duration
+                stats.self_time += duration - frame[0]
+                if stack:
+                    stack[-1][0] += duration
+
+                if tracing:
+                    peak = max(tracemalloc.get_traced_memory()[1], frame[2])
+                    stats.peak_memory = max(stats.peak_memory, peak - frame[1])
+                    if stack:
+                        stack[-1][2] = max(stack[-1][2], peak)
+                    tracemalloc.reset_peak()
+
+        # marks the wrapper, e.g. to leave it out when copying the component
+        wrapper.__instrumentation__ = self
+        return wrapper
+
+    def _subtree_self_time(self, path):
+        n = len(path)
+        return sum(
+            stats.self_time
+            for component, methods in self.stats.items()
+            if component[:n] == path
+            for stats in methods.values()
+        )
+
+    def to_dict(self) -> dict:
+        """Return the stats as JSON compatible dict, ordered by component path."""
+        return {
+            "components": [
+                {
+                    "path": list(path),
+                    "class": self.components[path],
+                    "subtree_self_time": self._subtree_self_time(path),
+                    "methods": {
+                        name: {
+                            field: getattr(stats, field) for field in stats.__slots__
+                        }
+                        for name, stats in self.stats[path].items()
+                        if stats.calls > 0
+                    },
+                }
+                for path in sorted(self.stats)
+            ]
+        }
+
+    def format_tree(self) -> str:
+        """Format the stats as a tree of components and their methods."""
+        rows = []
+        for path in sorted(self.stats):
+            indent = "  " * (len(path) - 1)
+            subtree = self._subtree_self_time(path)
+            rows.append(
+                (f"{indent}{path[-1]} ({self.components[path]})", "", subtree, "", "")
+            )
+            for name, stats in self.stats[path].items():
+                if stats.calls == 0:
+                    continue
+                rows.append(
+                    (
+                        f"{indent}  .{name}",
+                        stats.calls,
+                        stats.cumulative_time,
+                        stats.self_time,
+                        stats.peak_memory / 1024 if self.trace_memory else "",
+                    )
+                )
+
+        width = max([len("component"), *(len(row[0]) for row in rows)])
+        lines = [
+            f"{'component':<{width}} {'calls':>8} {'total [ms]':>11}"
+            f" {'self [ms]':>10} {'peak [KiB]':>11}"
+        ]
+        for name, calls, total, self_time, peak in rows:
+            total = f"{total * 1e3:.2f}"
+            self_time = f"{self_time * 1e3:.2f}" if self_time != "" else ""
+            peak = f"{peak:.1f}" if peak != "" else ""
+            lines.append(
+                f"{name:<{width}} {calls:>8} {total:>11} {self_time:>10} {peak:>11}"
+            )
+        return "\n".join(lines)
+
+
+# methods of the base classes defined in these modules are not instrumented
+_NOT_INSTRUMENTED_MODULES = {"pydantic_configtree.base", "pydantic_configtree.cli"}
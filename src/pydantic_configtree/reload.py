@@ -0,0 +1,319 @@
+"""Reloading the config of running tools when their config files change."""
+
+import logging
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from pydantic import AliasChoices
+from pydantic_settings import BaseSettings
+
+from .base import Config, Configurable
+from .sources import LazySection
+
+__all__ = [
+    "ConfigWatcher",
+]
+
+log = logging.getLogger(__name__)
+
+#: Private methods of pydantic-settings used to load the values of the sources
+_SETTINGS_HOOKS = ("_settings_init_sources", "_settings_build_values")
+
+
+class ConfigWatcher:
+    """Watch the config files of a tool and apply changes to its config tree.
+
+    The config files are polled for changes of their modification time and size.
+    On change, the values of all settings sources of the tool config are loaded
+    again and compared to the previous values, so values overridden e.g. on the
+    command line are not affected by changes of the files.
+    Only the config fields with changed values are validated again, all other
+    values are reused. The values of the sources are loaded using private methods
+    of pydantic-settings, if they are not available, the complete config is
+    loaded and compared instead.
+
+    Configurables of the tree of the tool whose config contains a changed
+    value get the new config assigned and are notified by calling their
+    `~pydantic_configtree.Configurable.config_changed` method, parents before children.
+    This includes configs in list or dict fields, these fields are validated again
+    as a whole.
+    Configurables whose config changed its class are not updated, their parent has
+    to create a new instance in its ``config_changed``.
+
+    Parameters
+    ----------
+    tool : Tool
+        The tool to watch, values given as ``config`` when creating the tool
+        instead of using the settings sources are not considered.
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signatures = self._stat_files()
+        self._values = self._load_values()
+
+    def _stat_files(self):
+        signatures = {}
+        for path in self.tool.config.config_files or []:
+            try:
+                stat = Path(path).stat()
+                signatures[path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                signatures[path] = None
+        return signatures
+
+    def _load_values(self):
+        config_cls = type(self.tool.config)
+        # private methods of pydantic-settings, to get only the values set by sources
+        if not all(hasattr(BaseSettings, name) for name in _SETTINGS_HOOKS):
+            return config_cls().model_dump(by_alias=True)
+
+        sources, init_kwargs = config_cls._settings_init_sources()
+        return config_cls._settings_build_values(sources, init_kwargs)
+
+    def poll(self) -> list[tuple[str, ...]]:
+        """Check the config files and apply changes.
+
+        Returns
+        -------
+        changed : list[tuple[str, ...]]
+            Paths of the config fields that were validated again.
+        """
+        with self._lock:
+            signatures = self._stat_files()
+            if signatures == self._signatures:
+                return []
+
+            values = self._load_values()
+            changed = _diff(self._values, values)
+            if changed:
+                updates = _group_updates(self.tool.config, changed, values)
+                self._apply(updates)
+
+            # only remember the new state once it is applied, so that a change
+            # failing validation is tried again on the next poll
+            self._signatures = signatures
+            self._values = values
+            if not changed:
+                return []
+
+            log.info("Reloaded config, changed: %s", ", ".join(map(".".join, changed)))
+            return [
+                path + (field,) for path, fields in updates.items() for field in fields
+            ]
+
+    def _apply(self, updates):
+        old_root = self.tool.config
+        new_root = _updated(old_root, (), updates)
+
+        # find the config path of each component using identity with the old tree
+        config_paths = {id(node): path for path, node in _walk_configs(old_root)}
+        updated_paths = [
+            path + (field,) for path, fields in updates.items() for field in fields
+        ]
+
+        for component in _walk_components(self.tool):
+            path = config_paths.get(id(component.config))
+            if path is None:
+                continue
+
+            changed = []
+            for updated in updated_paths:
+                if updated[: len(path)] == path:
+                    changed.append(updated[len(path) :])
+                elif path[: len(updated)] == updated:
+                    changed.append(())
+            if not changed:
+                continue
+
+            new_config = _get_path(new_root, path)
+            if type(new_config) is not type(component.config):
+                continue
+
+            old_config = component.config
+            component.config = new_config
+            component.config_changed(old_config, changed)
+
+    def start(self, interval: float = 1.0):
+        """Poll the config files every ``interval`` seconds in a background thread.
+
+        ``config_changed`` of the Configurables is then called in that thread.
+        Changes that fail to validate are logged and tried again on the next poll.
+        """
+        if self._thread is not None:
+            raise RuntimeError("ConfigWatcher is already running")
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="ConfigWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception:
+                log.exception("Failed to reload config, keeping the current config")
+
+    def stop(self):
+        """Stop the background thread started by `start`."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+def _diff(old: Any, new: Any, path: tuple[str, ...] = ()) -> list[tuple[str, ...]]:
+    """Paths of the values that differ between two nested mappings."""
+    if isinstance(old, LazySection):
+        old = old.load()
+    if isinstance(new, LazySection):
+        new = new.load()
+
+    if not (isinstance(old, Mapping) and isinstance(new, Mapping)):
+        return [] if old == new else [path]
+
+    changed = []
+    for key in old.keys() | new.keys():
+        if key not in old or key not in new:
+            changed.append((*path, key))
+        else:
+            changed.extend(_diff(old[key], new[key], (*path, key)))
+    return sorted(changed)
+
+
+def _field_name(config: Config, key: str) -> str | None:
+    fields = type(config).model_fields
+    if key in fields:
+        return key
+
+    for name, field in fields.items():
+        aliases = [field.alias]
+        if isinstance(field.validation_alias, AliasChoices):
+            aliases.extend(field.validation_alias.choices)
+        else:
+            aliases.append(field.validation_alias)
+        if key in aliases:
+            return name
+    return None
+
+
+def _group_updates(root, changed, values):
+    """Map each changed value to the closest config and the field to validate again."""
+    # other changes inside of a config with changed cls are covered by validating
+    # that config again as a whole, they might not even be fields of the old model
+    replaced = [path[:-1] for path in changed if len(path) > 1 and path[-1] == "cls"]
+    changed = [
+        path
+        for path in changed
+        if not any(
+            path[: len(prefix)] == prefix and path != (*prefix, "cls")
+            for prefix in replaced
+        )
+    ]
+
+    updates = {}
+    for path in changed:
+        node = root
+        container = ()
+        field = None
+        value_path = ()
+        for i, key in enumerate(path):
+            field = _field_name(node, key)
+            if field is None:
+                break
+            value_path = path[: i + 1]
+
+            # sections not validated yet are validated again as a whole
+            child = node.__dict__.get(field)
+            if i == len(path) - 1 or not isinstance(child, Config):
+                break
+            container = (*container, field)
+            node = child
+
+        if field is None:
+            log.warning("Cannot reload unknown config value %s", ".".join(path))
+            continue
+
+        # a changed cls changes the model of the config, validate it again as a whole
+        if field == "cls" and container:
+            container, field = container[:-1], container[-1]
+            value_path = value_path[:-1]
+
+        value = _get_path(values, value_path, default=_DEFAULT)
+        updates.setdefault(container, {})[field] = value
+    return updates
+
+
+#: Marker for values not set by any source, the default of the field is used
+_DEFAULT = object()
+
+
+def _get_path(node, path, default=None):
+    for key in path:
+        if isinstance(node, Mapping):
+            if key not in node:
+                return default
+            node = node[key]
+            if isinstance(node, LazySection):
+                node = node.load()
+        elif isinstance(node, list | tuple):
+            if key >= len(node):
+                return default
+            node = node[key]
+        else:
+            node = getattr(node, key)
+    return node
+
+
+def _updated(node: Config, path: tuple[str, ...], updates) -> Config:
+    """Copy of ``node`` with updated fields, copying all configs along the way."""
+    n = len(path)
+    fields = updates.get(path, {})
+    children = {p[n] for p in updates if len(p) > n and p[:n] == path} - fields.keys()
+    if not fields and not children:
+        return node
+
+    new = node.model_copy()
+    for field in children:
+        new.__dict__[field] = _updated(getattr(node, field), (*path, field), updates)
+
+    for field, value in fields.items():
+        if value is _DEFAULT:
+            value = (
+                type(node)
+                .model_fields[field]
+                .get_default(call_default_factory=True, validated_data=new.__dict__)
+            )
+        new.__pydantic_validator__.validate_assignment(new, field, value)
+        new._discard_lazy_section(field)
+    return new
+
+
+def _walk_configs(value: Any, path: tuple = ()):
+    """Configs nested in ``value`` and their paths, also inside of lists and dicts."""
+    if isinstance(value, Config):
+        yield path, value
+        # sections not validated yet cannot be the config of a component
+        for field, child in value.__dict__.items():
+            if field in type(value).model_fields:
+                yield from _walk_configs(child, (*path, field))
+    elif isinstance(value, list | tuple):
+        for i, child in enumerate(value):
+            yield from _walk_configs(child, (*path, i))
+    elif isinstance(value, Mapping):
+        for key, child in value.items():
+            yield from _walk_configs(child, (*path, key))
+
+
+def _walk_components(component: Configurable):
+    yield component
+    # children returns a copy made under a lock, components might be created meanwhile
+    for child in component.children:
+        yield from _walk_components(child)
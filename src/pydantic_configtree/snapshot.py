@@ -0,0 +1,205 @@
+"""Binary snapshots of fully resolved and validated configs.
+
+Writing a snapshot of the validated config of a `~pydantic_configtree.Tool`
+allows to skip resolving the config sources and validating the config
+in later runs using the same config, e.g. for many short batch jobs.
+
+Snapshots use `pickle`, only load snapshots from trusted sources.
+"""
+
+import functools
+import hashlib
+import logging
+import pickle
+import re
+from os import PathLike
+from types import CodeType
+from typing import TypeVar, get_args
+
+import pydantic
+from pydantic import BaseModel
+
+from ._version import __version__
+
+__all__ = [
+    "read_snapshot",
+    "schema_hash",
+    "write_snapshot",
+]
+
+log = logging.getLogger(__name__)
+
+#: Version of the snapshot format
+SNAPSHOT_VERSION = 1
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+
+def _nested_models(annotation):
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        yield annotation
+
+    for arg in get_args(annotation):
+        yield from _nested_models(arg)
+
+
+def _field_signature(name, field):
+    if field.default_factory is not None:
+        default = field.default_factory.__qualname__
+    else:
+        default = repr(field.default)
+
+    return _value_signature(
+        (
+            name,
+            field.annotation,
+            field.metadata,
+            default,
+            field.alias,
+            field.validation_alias,
+            field.discriminator,
+        )
+    )
+
+
+def _code_signature(code: CodeType) -> str:
+    consts = tuple(
+        _code_signature(const) if isinstance(const, CodeType) else repr(const)
+        for const in code.co_consts
+    )
+    return repr((code.co_code, consts, code.co_names))
+
+
+#: Memory addresses, e.g. in the repr of functions, differ between processes
+_ADDRESS = re.compile(r"0x[0-9a-fA-F]{6,}")
+
+
+def _value_signature(value) -> str:
+    return _ADDRESS.sub("", repr(value))
+
+
+def _function_signature(func, closure=True) -> str:
+    if isinstance(func, functools.partial):
+        return repr(
+            (
+                _function_signature(func.func),
+                _value_signature(func.args),
+                _value_signature(func.keywords),
+            )
+        )
+
+    func = getattr(func, "__func__", func)
+    code = getattr(func, "__code__", None)
+    if code is None:
+        # builtins and other callables without python code
+        return getattr(func, "__qualname__", type(func).__qualname__)
+
+    cells = []
+    for cell in (func.__closure__ or ()) if closure else ():
+        value = cell.cell_contents
+        if callable(value) and not isinstance(value, type):
+            cells.append(_function_signature(value, closure=False))
+        else:
+            cells.append(_value_signature(value))
+    return repr((func.__qualname__, _code_signature(code), cells))
+
+
+def _schema_functions(schema):
+    """Yield all functions of a core schema, e.g. validators and serializers."""
+    if isinstance(schema, dict):
+        for value in schema.values():
+            yield from _schema_functions(value)
+    elif isinstance(schema, list | tuple):
+        for value in schema:
+            yield from _schema_functions(value)
+    elif callable(schema) and not isinstance(schema, type):
+        yield schema
+
+
+def schema_hash(config_cls: type[BaseModel]) -> str:
+    """Compute a hash of the structure of a config model and all nested models.
+
+    The hash covers the versions of this package and pydantic, the qualified names,
+    fields and validator names of the model and all models used in its fields,
+    as well as the code of all functions used in the validation and serialization
+    of the model, e.g. validators or the functions of custom types.
+
+    Only the code of these functions is covered, changes of functions or global
+    values used by them do not change the hash.
+    """
+    sha = hashlib.sha256()
+    sha.update(f"{__version__} {pydantic.VERSION}".encode())
+
+    seen = set()
+    models = [config_cls]
+    while models:
+        model = models.pop()
+        if model in seen:
+            continue
+        seen.add(model)
+
+        sha.update(f"{model.__module__}.{model.__qualname__}".encode())
+        for name, field in model.model_fields.items():
+            sha.update(_field_signature(name, field).encode())
+            models.extend(_nested_models(field.annotation))
+
+        decorators = model.__pydantic_decorators__
+        for kind in ("validators", "field_validators", "model_validators"):
+            names = sorted(getattr(decorators, kind))
+            sha.update(f"{kind}: {names}".encode())
+
+    for func in _schema_functions(config_cls.__pydantic_core_schema__):
+        sha.update(_function_signature(func).encode())
+
+    return sha.hexdigest()
+
+
+def write_snapshot(config: BaseModel, path: str | PathLike):
+    """Write a validated config to a binary snapshot file.
+
+    Besides the pickled config, the snapshot contains the `schema_hash` of the
+    config model and the config as JSON, to be able to validate it again
+    in case the config classes changed.
+    """
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "schema_hash": schema_hash(type(config)),
+        "config": pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL),
+        "json": config.model_dump_json(by_alias=True),
+    }
+
+    with open(path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_snapshot(config_cls: type[ModelType], path: str | PathLike) -> ModelType:
+    """Read a config from a snapshot written by `write_snapshot`.
+
+    If the schema hash of ``config_cls`` matches the one stored in the snapshot,
+    the stored config is used without validation.
+    Otherwise, the config is validated again from its JSON representation.
+
+    The hash covers the code of validators and custom types directly used
+    in the config models, but not of other functions they call,
+    see `schema_hash`. Remove snapshots after changing such functions.
+    """
+    with open(path, "rb") as f:
+        snapshot = pickle.load(f)
+
+    version = snapshot.get("version")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}"
+        )
+
+    if snapshot["schema_hash"] == schema_hash(config_cls):
+        try:
+            config = pickle.loads(snapshot["config"])
+        except Exception:
+            log.warning("Failed to load config from snapshot %s", path, exc_info=True)
+        else:
+            if isinstance(config, config_cls):
+                return config
+
+    log.info("Config classes changed since writing snapshot %s, validating", path)
+    return config_cls.model_validate_json(snapshot["json"])
@@ -1,32 +1,349 @@
 """Additional SettingsSource implementations."""
 
+import mmap
+import os
+import struct
+import threading
+import tomllib
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
 from pathlib import Path
 from typing import Any
 
+from pydantic_core import from_json, to_json
 from pydantic_settings import BaseSettings
-from pydantic_settings.sources import (
-    InitSettingsSource,
-    JsonConfigSettingsSource,
-    TomlConfigSettingsSource,
-    YamlConfigSettingsSource,
-)
+from pydantic_settings.sources import InitSettingsSource
+
+from .profiling import measure
+
+__all__ = [
+    "CliConfigSettingsSource",
+    "ConfigFileCache",
+    "LazySection",
+    "config_file_cache",
+    "deep_merge",
+    "find_origin",
+    "parse_config_file",
+    "write_sectioned_config",
+]
+
+#: Magic bytes at the start of a sectioned config file
+SECTIONED_MAGIC = b"PCTSJSON"
+
+# magic bytes and size of the JSON encoded section index
+_SECTIONED_HEADER = struct.Struct("<8sQ")
+
+
+class ConfigFileCache:
+    """A cache of parsed config files.
+
+    Entries are keyed by the resolved path of the file and are only valid as long
+    as modification time and size of the file are unchanged.
+    The least recently used entries are evicted when ``maxsize`` is exceeded.
+
+    `load` returns a copy of the nested dicts and lists of the cached data,
+    so callers, e.g. validators in ``before`` mode, can modify it.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached files, 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(
+        self, path: Path, parse: Callable[[Path], dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Return a copy of the parsed contents of ``path``, parsing it only if needed."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return _copy_containers(entry[1])
+
+        data = parse(path)
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._entries[path] = (signature, data)
+                self._entries.move_to_end(path)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                return _copy_containers(data)
+
+        return data
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):  # noqa: D105
+        return len(self._entries)
+
+    def __contains__(self, path: os.PathLike | str):  # noqa: D105
+        return Path(path).resolve() in self._entries
+
+
+def _copy_containers(value):
+    # parsed config files only contain immutable values besides these containers,
+    # copying them explicitly is much faster than copy.deepcopy
+    if isinstance(value, dict):
+        return {key: _copy_containers(v) for key, v in value.items()}
+    if isinstance(value, list | set):
+        return type(value)(_copy_containers(v) for v in value)
+    return value
+
+
+def _parse_toml(path: Path) -> dict[str, Any]:
+    with path.open("rb") as f:
+        return tomllib.load(f)
+
+
+def _parse_json(path: Path) -> dict[str, Any]:
+    # pydantic-core's json parser is considerably faster than the json module
+    return from_json(path.read_bytes()) or {}
+
+
+def _parse_yaml(path: Path) -> dict[str, Any]:
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("PyYAML is required to load YAML config files") from None
+
+    # use the libyaml based loader if available, it is much faster
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with path.open("rb") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+
+class LazySection:
+    """A top-level value of a sectioned config file that is decoded only on request.
+
+    The section is a placeholder in the parsed config, its JSON is only decoded
+    by `load`. `~pydantic_configtree.Config` defers the validation of sections
+    for fields with a default to the first access of the field.
+
+    The placeholder is not a mapping, code processing config values has to
+    decode it explicitly. `CliConfigSettingsSource` decodes sections whenever
+    they have to be merged with the values of other settings sources.
+    """
+
+    __slots__ = ("_buffer", "_start", "_stop")
+
+    def __init__(self, buffer: mmap.mmap | bytes, start: int, stop: int):
+        self._buffer = buffer
+        self._start = start
+        self._stop = stop
+
+    def load(self) -> Any:
+        """Decode the JSON of this section."""
+        return from_json(self._buffer[self._start : self._stop])
+
+    @property
+    def size(self) -> int:
+        """Size of the encoded section in bytes."""
+        return self._stop - self._start
+
+    def __reduce__(self):  # noqa: D105
+        # memory maps cannot be pickled
+        return (LazySection, (self._buffer[self._start : self._stop], 0, self.size))
+
+    def __repr__(self):  # noqa: D105
+        return f"<LazySection, {self.size} bytes>"
+
+
+def write_sectioned_config(path: Path, data: Mapping[str, Any]):
+    """Write a sectioned config file, which is loaded lazily by `CliConfigSettingsSource`.
+
+    Each top-level value of ``data`` is stored as a separate JSON document.
+    When the file is loaded, it is memory-mapped and only the index of the sections
+    is decoded, see `LazySection`.
+
+    The file is replaced atomically, so that processes still using
+    the previous version of the file are not affected.
+
+    Parameters
+    ----------
+    path : Path
+        Output path, should use the ``.sjson`` suffix.
+    data : Mapping
+        The config, e.g. as loaded from a JSON file or ``Config.model_dump()``.
+    """
+    path = Path(path)
+    sections = [(key, to_json(value)) for key, value in data.items()]
+
+    index = {}
+    offset = 0
+    for key, section in sections:
+        index[key] = [offset, len(section)]
+        offset += len(section)
+    index = to_json(index)
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_SECTIONED_HEADER.pack(SECTIONED_MAGIC, len(index)))
+        f.write(index)
+        for _, section in sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+
+
+def _parse_sectioned(path: Path) -> dict[str, LazySection]:
+    with path.open("rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, index_size = _SECTIONED_HEADER.unpack_from(buffer)
+    if magic != SECTIONED_MAGIC:
+        raise ValueError(f"{path} is not a sectioned config file")
+
+    start = _SECTIONED_HEADER.size + index_size
+    index = from_json(buffer[_SECTIONED_HEADER.size : start])
+    return {
+        key: LazySection(buffer, start + offset, start + offset + size)
+        for key, (offset, size) in index.items()
+    }
+
+
+_PARSERS = {
+    ".toml": _parse_toml,
+    ".json": _parse_json,
+    ".sjson": _parse_sectioned,
+    ".yml": _parse_yaml,
+    ".yaml": _parse_yaml,
+}
+
+
+def parse_config_file(path: Path) -> dict[str, Any]:
+    """Parse a YAML, JSON, TOML or sectioned config file, selecting the format by suffix."""
+    parse = _PARSERS.get(path.suffix)
+    if parse is None:
+        raise ValueError(
+            f"Config file path {path} has unsupported format: {path.suffix}"
+        )
+    return parse(path)
+
+
+def deep_merge(
+    base: dict[str, Any],
+    update: Mapping[str, Any],
+    origin: Any = None,
+    origins: dict[tuple[str, ...], Any] | None = None,
+    _path: tuple[str, ...] = (),
+) -> dict[str, Any]:
+    """Recursively merge ``update`` into ``base`` in place.
+
+    Mappings present in both are merged, all other values, including lists,
+    are replaced by the value in ``update``.
+    Neither ``update`` nor mappings already contained in ``base`` are modified,
+    only the mappings along merged paths are copied.
+
+    Parameters
+    ----------
+    base : dict
+        The dict to merge into.
+    update : Mapping
+        The values to merge into ``base``.
+    origin : Any
+        Origin of the values in ``update``, e.g. the path of the config file.
+    origins : dict | None
+        If given, filled with the origin of each value set by ``update``,
+        keyed by the path of the value in the nested dicts.
+        Values of nested mappings that were not merged are not listed separately,
+        their origin is the one of their closest parent, see `find_origin`.
+
+    Returns
+    -------
+    base : dict
+        The modified ``base``.
+
+    Examples
+    --------
+    >>> base = {"a": {"b": 1, "c": [1, 2]}, "d": 1}
+    >>> deep_merge(base, {"a": {"c": [3]}})
+    {'a': {'b': 1, 'c': [3]}, 'd': 1}
+    """
+    for key, value in update.items():
+        path = (*_path, key)
+        current = base.get(key)
+
+        # sections have to be decoded to be merged, replacing them keeps them lazy
+        if isinstance(value, LazySection) and isinstance(current, Mapping):
+            value = value.load()
+        if isinstance(current, LazySection) and isinstance(value, Mapping):
+            current = current.load()
+
+        if isinstance(value, Mapping) and isinstance(current, Mapping):
+            # copy only this level, current might be shared, e.g. with the file cache
+            base[key] = deep_merge(dict(current), value, origin, origins, path)
+            continue
+
+        if origins is not None:
+            if isinstance(current, Mapping):
+                # remove origins of the values nested in the replaced mapping,
+                # only these can have their own entries
+                n = len(path)
+                for replaced in [p for p in origins if len(p) > n and p[:n] == path]:
+                    del origins[replaced]
+            origins[path] = origin
+
+        base[key] = value
+
+    return base
+
+
+def find_origin(origins: Mapping[tuple[str, ...], Any], path: tuple[str, ...]) -> Any:
+    """Find the origin of the value at ``path`` in origins filled by `deep_merge`.
+
+    Returns None if the value at ``path`` was not set by any merged mapping.
+    """
+    for end in range(len(path), 0, -1):
+        if (origin := origins.get(path[:end])) is not None:
+            return origin
+    return None
+
+
+#: Process-wide cache of config files parsed by `CliConfigSettingsSource`
+config_file_cache = ConfigFileCache()
 
 
 class CliConfigSettingsSource(InitSettingsSource):
     """A SettingsSource that loads config files assuming the CLI has an option for config files.
 
     Supports loading YAML, JSON and TOML files.
+    Parsed files are cached in `config_file_cache` until they change on disk.
+
+    Sectioned config files (``.sjson``, see `write_sectioned_config`) are memory-mapped
+    and their top-level sections are only decoded and validated when the
+    corresponding config field is first accessed.
+
+    Multiple config files are merged recursively using `deep_merge`, later files
+    take precedence. The file each value came from can be retrieved using `origin`.
     """
 
     def __init__(self, settings_cls: type[BaseSettings]):
         super().__init__(settings_cls=settings_cls, init_kwargs={})
+        self.origins: dict[tuple[str, ...], Path] = {}
+
+    def origin(self, *path: str) -> Path | None:
+        """Get the config file the value at the given (nested) key path came from."""
+        return find_origin(self.origins, path)
 
     def __call__(self) -> dict[str, Any]:  # noqa: D102
         # check if we got config files on the CLI, c is the first alias
         # of the config_files field in Tool which is what is used in state
-        config_files = self.current_state.get("c", [])
+        config_files = self.current_state.get("c") or []
 
         config = {}
+        self.origins = {}
 
         if len(config_files) > 0:
             for config_file in config_files:
@@ -35,27 +352,20 @@ class CliConfigSettingsSource(InitSettingsSource):
                 if not config_file.is_file():
                     continue
 
-                if config_file.suffix == ".toml":
-                    source = TomlConfigSettingsSource(
-                        self.settings_cls, toml_file=config_file
-                    )
-                    new_config = source.toml_data
-                elif config_file.suffix == ".json":
-                    source = JsonConfigSettingsSource(
-                        self.settings_cls, json_file=config_file
-                    )
-                    new_config = source.json_data
-                elif config_file.suffix in {".yml", ".yaml"}:
-                    source = YamlConfigSettingsSource(
-                        self.settings_cls, yaml_file=config_file
-                    )
-                    new_config = source.yaml_data
-                else:
-                    raise ValueError(
-                        f"Config file path {config_file} has unsupported format: {config_file.suffix}"
-                    )
-
-                config.update(new_config)
+                with measure(f"file {config_file}"):
+                    new_config = config_file_cache.load(config_file, parse_config_file)
+                    deep_merge(config, new_config, config_file, self.origins)
+
+        # sections are only kept lazy if pydantic-settings passes them on as they are,
+        # i.e. if no other source has values to merge and the values are not dumped
+        decode_all = self.config.get("nested_model_default_partial_update", False)
+        case_sensitive = self.config.get("case_sensitive", False)
+        merged = {key if case_sensitive else key.lower() for key in self.current_state}
+        for key, value in config.items():
+            if type(value) is not LazySection:
+                continue
+            if decode_all or (key if case_sensitive else key.lower()) in merged:
+                config[key] = value.load()
 
         super().__init__(self.settings_cls, config)
         return super().__call__()
@@ -85,3 +85,97 @@ def test_dump_model_quantity():
 
     assert Foo().model_dump() == {"q": {"value": 5.0, "unit": "s"}}
     assert json.loads(Foo().model_dump_json()) == {"q": {"value": 5.0, "unit": "s"}}
+
+
+def test_quantity_array(tmp_path, monkeypatch):
+    import numpy as np
+    from astropy.tests.helper import assert_quantity_allclose
+
+    class Calibration(BaseModel):
+        gains: AstropyQuantity[u.m]
+        bins: AstropyQuantity
+
+    values = np.arange(6.0).reshape(2, 3)
+    calibration = Calibration(
+        gains={"value": values.tolist(), "unit": "cm"},
+        bins=np.linspace(0, 1, 5) * u.TeV,
+    )
+    assert calibration.gains.shape == (2, 3)
+    assert calibration.gains.unit == u.m
+    assert_quantity_allclose(calibration.gains, values * u.cm)
+
+    dumped = calibration.model_dump()
+    assert dumped["gains"] == {"value": (values / 100).tolist(), "unit": "m"}
+    assert dumped["bins"]["unit"] == "TeV"
+
+    roundtrip = Calibration.model_validate_json(calibration.model_dump_json())
+    assert_quantity_allclose(roundtrip.gains, calibration.gains)
+    assert_quantity_allclose(roundtrip.bins, calibration.bins)
+
+    path = tmp_path / "gains.npy"
+    np.save(path, values)
+    data = {"gains": {"npy": str(path), "unit": "cm"}, "bins": "1 TeV"}
+    from_npy = Calibration.model_validate_json(json.dumps(data))
+    assert_quantity_allclose(from_npy.gains, values * u.cm)
+
+    # relative paths would depend on the working directory, not the config file
+    monkeypatch.chdir(tmp_path)
+    data["gains"]["npy"] = "gains.npy"
+    with pytest.raises(ValidationError, match="must be absolute"):
+        Calibration.model_validate(data)
+
+    with pytest.raises(ValidationError):
+        Calibration(gains={"value": [[1.0], [2.0, 3.0]], "unit": "m"}, bins=1 * u.m)
+
+
+def test_quantity_unit_cache():
+    from pydantic_configtree import astropy as pct_astropy
+
+    pct_astropy._parse_unit.cache_clear()
+    pct_astropy._conversion_factor.cache_clear()
+
+    ta = TypeAdapter(list[AstropyQuantity[u.m]])
+    values = ta.validate_python(
+        [{"value": float(i), "unit": "cm"} for i in range(100)] + [2 * u.km]
+    )
+    assert values[10] == 0.1 * u.m
+    assert values[-1] == 2000 * u.m
+    assert all(q.unit == u.m for q in values)
+
+    assert pct_astropy._parse_unit.cache_info().misses == 1
+    assert pct_astropy._conversion_factor.cache_info().misses == 2
+
+    dumped = ta.dump_python(values)
+    assert dumped[10] == {"value": 0.1, "unit": "m"}
+
+    with pytest.raises(ValidationError, match="not convertible"):
+        ta.validate_python([{"value": 1.0, "unit": "s"}])
+
+
+def test_time_array():
+    from pydantic_configtree.astropy import AstropyTime
+
+    class Observations(BaseModel):
+        windows: AstropyTime
+        reference: AstropyTime
+
+    starts = [f"2020-01-{day:02d}T20:00:00.000000000" for day in range(1, 31)]
+    data = {"windows": starts, "reference": "2020-01-01 00:00:00"}
+    observations = Observations.model_validate_json(json.dumps(data))
+    assert observations.windows.shape == (30,)
+    assert observations.windows.scale == "utc"
+    assert observations.reference == Time("2020-01-01T00:00:00")
+
+    dumped = json.loads(observations.model_dump_json())
+    assert dumped["windows"] == starts
+    assert dumped["reference"] == "2020-01-01T00:00:00.000000000"
+
+    # serialization neither changes the precision nor the scale of the time
+    t = Time("2020-01-01T00:00:00", scale="tt")
+    ta = TypeAdapter(AstropyTime)
+    assert ta.dump_python(t, mode="json") == "2019-12-31T23:58:50.816000000"
+    assert t.precision == 3
+    assert t.scale == "tt"
+
+    with pytest.raises(ValidationError):
+        ta.validate_json(json.dumps(["2020-01-01T00:00:00", "not a time"]))
@@ -5,7 +5,7 @@ from textwrap import dedent
 import pytest
 import tomlkit
 import yaml
-from pydantic import ValidationError
+from pydantic import ValidationError, field_validator
 from pydantic_settings import SettingsConfigDict, SettingsError
 
 from pydantic_configtree import Config, Configurable, Tool
@@ -98,3 +98,451 @@ def test_invalid_option(monkeypatch):
     monkeypatch.setattr(sys, "argv", ["example-tool", "--non-existent-option=1.0"])
     with pytest.raises(SettingsError):
         ExampleTool()
+
+
+def test_count_validations(monkeypatch):
+    from pydantic_configtree.base import count_validations
+
+    monkeypatch.setattr(sys, "argv", ["example-tool", "--value=5"])
+    with count_validations() as counts:
+        tool = ExampleTool()
+        tool.setup()
+
+    assert tool.config.value == 5
+    assert tool.component.config is tool.config.component
+    # only the tool config is validated, the component reuses the nested config
+    assert counts == {"ExampleTool": 1}
+
+
+def test_config_file_cached(tmp_path, monkeypatch):
+    from pydantic_configtree.sources import config_file_cache
+
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        yaml.safe_dump({"value": 2, "component": {"cls": "Bar", "bar_option": 4}})
+    )
+
+    config_file_cache.clear()
+    monkeypatch.setattr(sys, "argv", ["example-tool", "-c", str(config_path)])
+    first = ExampleTool()
+    assert config_path in config_file_cache
+    second = ExampleTool()
+
+    assert first.config == second.config
+    assert second.config.component.bar_option == 4
+    config_file_cache.clear()
+
+
+def test_config_file_cache_not_modified(tmp_path, monkeypatch):
+    from pydantic_configtree.sources import config_file_cache
+
+    class AppendingTool(Tool):
+        class __config__(Tool.__config__):
+            values: list[int] = []
+
+            @field_validator("values", mode="before")
+            @classmethod
+            def append_zero(cls, value):
+                value.append(0)
+                return value
+
+        def run(self):
+            pass
+
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"values": [1]}))
+
+    config_file_cache.clear()
+    monkeypatch.setattr(sys, "argv", ["appending-tool", "-c", str(config_path)])
+    # validators modifying the loaded values must not change the cached file
+    for _ in range(3):
+        assert AppendingTool().config.values == [1, 0]
+    config_file_cache.clear()
+
+
+def test_multiple_config_files_merged(tmp_path, monkeypatch):
+    base_path = tmp_path / "base.yaml"
+    base_path.write_text(
+        yaml.safe_dump(
+            {"value": 2, "component": {"cls": "Bar", "common": 3, "bar_option": 4}}
+        )
+    )
+    override_path = tmp_path / "override.json"
+    override_path.write_text(json.dumps({"component": {"bar_option": 5}}))
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["example-tool", "-c", str(base_path), "-c", str(override_path)],
+    )
+    tool = ExampleTool()
+
+    assert tool.config.value == 2
+    assert tool.config.component.cls == "Bar"
+    assert tool.config.component.common == 3
+    assert tool.config.component.bar_option == 5
+
+
+def test_profile_startup(capsys, tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"value": 2}))
+
+    monkeypatch.setattr(
+        sys, "argv", ["example-tool", "--profile-startup", "-c", str(config_path)]
+    )
+    tool = ExampleTool()
+    tool.start()
+
+    # the table is logged by the tool
+    table = capsys.readouterr().err
+    assert "INFO [ExampleTool]: Startup profile:" in table
+    for phase in (
+        "config",
+        "source setup",
+        "source CliConfigSettingsSource",
+        f"file {config_path}",
+        "validation",
+        "logging setup",
+        "setup",
+        "run",
+        "finish",
+    ):
+        assert f"\n{phase} " in table or f"  {phase} " in table
+
+    output_path = tmp_path / "profile.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["example-tool", "--profile-startup", "--profile-output", str(output_path)],
+    )
+    ExampleTool().start()
+    phases = json.loads(output_path.read_text())["phases"]
+    assert [phase["name"] for phase in phases if phase["depth"] == 0] == [
+        "config",
+        "logging setup",
+        "setup",
+        "run",
+        "finish",
+    ]
+    assert all(phase["wall_time"] >= 0 for phase in phases)
+
+    # profiling disabled by default
+    monkeypatch.setattr(sys, "argv", ["example-tool"])
+    assert ExampleTool().profiler is None
+
+
+def test_profile_startup_only_from_cli(monkeypatch):
+    from pydantic_configtree import cli
+
+    created = []
+
+    class RecordingProfiler(cli.StartupProfiler):
+        def __init__(self):
+            super().__init__()
+            created.append(self)
+
+    monkeypatch.setattr(cli, "StartupProfiler", RecordingProfiler)
+    monkeypatch.setattr(sys, "argv", ["example-tool", "--profile-startup"])
+
+    # the command line is not checked for tools created from a given config
+    config = ExampleTool.__config__(_cli_parse_args=False, value=3)
+    tool = ExampleTool(config=config)
+    assert tool.profiler is None
+    assert created == []
+
+    class ArgsTool(ExampleTool):
+        class __config__(ExampleTool.__config__):
+            model_config = SettingsConfigDict(cli_parse_args=["--value=4"])
+
+    # the arguments given in cli_parse_args are checked instead of sys.argv
+    tool = ArgsTool()
+    assert tool.config.value == 4
+    assert tool.profiler is None
+    assert created == []
+
+    tool = ExampleTool()
+    assert tool.profiler is created[0]
+    tool.profiler.stop()
+
+
+def test_profile_startup_unknown_pydantic_settings(capsys, monkeypatch):
+    from pydantic_configtree import profiling
+
+    # private hooks of pydantic-settings are not available, sources are not wrapped
+    monkeypatch.setattr(profiling, "_SOURCE_HOOKS", ("_hook_of_another_version",))
+    monkeypatch.setattr(sys, "argv", ["example-tool", "--profile-startup", "--value=3"])
+    tool = ExampleTool()
+    assert tool.config.value == 3
+    tool.start()
+
+    table = capsys.readouterr().err
+    assert "source setup" in table
+    assert "source CliConfigSettingsSource" not in table
+
+    with profiling.use_profiler(profiling.StartupProfiler()) as profiler:
+        assert profiling.profile_init_sources("unexpected") == "unexpected"
+    profiler.stop()
+
+
+def test_instrumentation(monkeypatch):
+    class Worker(Configurable):
+        def process(self, value):
+            return self.square(value) + 1
+
+        def square(self, value):
+            return value**2
+
+    class InstrumentedTool(Tool):
+        class __config__(Tool.__config__):
+            pass
+
+        def setup(self):
+            self.worker = Worker(parent=self, name="worker")
+
+        def run(self):
+            self.results = [self.worker.process(i) for i in range(10)]
+
+    monkeypatch.setattr(sys, "argv", ["instrumented-tool"])
+    tool = InstrumentedTool()
+    tool.start()
+    assert tool._instrumentation is None
+    assert "process" not in vars(tool.worker)
+
+    monkeypatch.setattr(sys, "argv", ["instrumented-tool", "--instrument"])
+    tool = InstrumentedTool()
+    tool.start()
+    assert tool.results == [i**2 + 1 for i in range(10)]
+
+    stats = tool._instrumentation.stats
+    assert set(stats) == {("InstrumentedTool",), ("InstrumentedTool", "worker")}
+    # base class methods are not instrumented
+    assert set(stats[("InstrumentedTool",)]) == {"setup", "run"}
+
+    process = stats[("InstrumentedTool", "worker")]["process"]
+    square = stats[("InstrumentedTool", "worker")]["square"]
+    assert process.calls == square.calls == 10
+    assert process.self_time <= process.cumulative_time - square.cumulative_time + 1e-9
+
+    report = tool._instrumentation.format_tree()
+    assert "  worker (Worker)" in report
+    assert "    .square" in report
+
+
+def test_copy_instrumented(monkeypatch):
+    import copy
+
+    class Worker(Configurable):
+        def process(self, value):
+            return value + 1
+
+    class InstrumentedTool(Tool):
+        class __config__(Tool.__config__):
+            pass
+
+        def setup(self):
+            self.worker = Worker(parent=self, name="worker")
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(sys, "argv", ["instrumented-tool", "--instrument"])
+    tool = InstrumentedTool()
+    tool.setup()
+    stats = tool._instrumentation.stats[("InstrumentedTool", "worker")]["process"]
+
+    # copies are not instrumented, calls are not counted for the original
+    for copied in (copy.copy(tool.worker), copy.deepcopy(tool.worker)):
+        assert copied._instrumentation is None
+        assert "process" not in vars(copied)
+        assert copied.process(1) == 2
+    assert stats.calls == 0
+
+    deep = copy.deepcopy(tool)
+    assert deep.worker.process(1) == 2
+    assert deep.children == []
+    assert stats.calls == 0
+
+
+def test_instrumentation_memory(tmp_path, monkeypatch):
+    import tracemalloc
+
+    class Allocator(Configurable):
+        def allocate(self):
+            data = bytearray(4 * 1024**2)
+            return len(data)
+
+    class AllocatingTool(Tool):
+        class __config__(Tool.__config__):
+            pass
+
+        def setup(self):
+            self.allocator = Allocator(parent=self, name="allocator")
+
+        def run(self):
+            self.tracing = tracemalloc.is_tracing()
+            self.allocator.allocate()
+
+    monkeypatch.setattr(
+        sys, "argv", ["allocating-tool", "--instrument", "--instrument-memory"]
+    )
+    tool = AllocatingTool()
+    tool.start()
+    stats = tool._instrumentation.stats[("AllocatingTool", "allocator")]
+    assert stats["allocate"].peak_memory >= 4 * 1024**2
+
+    # memory tracing slows down allocations, it is disabled by default
+    monkeypatch.setattr(sys, "argv", ["allocating-tool", "--instrument"])
+    tool = AllocatingTool()
+    tool.start()
+    assert not tool.tracing
+    assert tool._instrumentation.stats[("AllocatingTool",)]["run"].calls == 1
+    stats = tool._instrumentation.stats[("AllocatingTool", "allocator")]
+    assert stats["allocate"].peak_memory == 0
+
+    # instrumented methods do not reset the peak memory of profiled phases
+    output_path = tmp_path / "profile.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "allocating-tool",
+            "--instrument",
+            "--instrument-memory",
+            "--profile-startup",
+            "--profile-output",
+            str(output_path),
+        ],
+    )
+    AllocatingTool().start()
+    phases = json.loads(output_path.read_text())["phases"]
+    run = next(phase for phase in phases if phase["name"] == "run")
+    assert run["peak_memory"] >= 4 * 1024**2
+
+
+class ParallelTool(Tool):
+    class __config__(Tool.__config__):
+        component: Component.configurable_subclasses() = Foo.__config__(foo_option=2)
+
+    def setup(self):
+        self.component = Component.from_config(
+            config=self.config.component, parent=self, name="component"
+        )
+
+    def process_item(self, item):
+        import os
+
+        return item * self.component.config.common, os.getpid(), id(self.component)
+
+    def run(self):
+        pass
+
+
+def test_pickle_configurable():
+    import pickle
+
+    foo = Foo(config={"foo_option": 5}, name="foo")
+    copy = pickle.loads(pickle.dumps(foo))
+    assert type(copy) is Foo
+    assert copy.name == "foo"
+    assert copy.config == foo.config
+    assert copy.parent is None
+
+
+def test_pickle_configurable_extra_parameters():
+    import pickle
+
+    class Camera(Component):
+        class __config__(Component.__config__):
+            pass
+
+        def __init__(self, config=None, parent=None, name=None, subarray=None):
+            super().__init__(config=config, parent=parent, name=name)
+            self.subarray = subarray
+
+    # the subarray is not part of the config and would be lost
+    with pytest.raises(TypeError, match=r"additional parameters \['subarray'\]"):
+        pickle.dumps(Camera(subarray=[1, 2]))
+
+
+def test_copy_configurable():
+    import copy
+
+    parent = Foo(config={"foo_option": 1}, name="parent")
+    foo = Foo(config={"foo_option": 5}, parent=parent, name="foo")
+    foo.state = [1, 2]
+
+    shallow = copy.copy(foo)
+    assert shallow.parent is parent
+    assert shallow.config is foo.config
+    assert shallow.state is foo.state
+
+    deep = copy.deepcopy(foo)
+    assert deep.parent is parent
+    assert deep.config == foo.config
+    assert deep.state == foo.state
+    assert deep.state is not foo.state
+
+
+def test_pickle_tool(monkeypatch):
+    import pickle
+
+    argv = ["parallel-tool", "--component.cls=Foo", "--component.common=3"]
+    monkeypatch.setattr(sys, "argv", argv)
+    tool = ParallelTool()
+    assert tool.config.component.common == 3
+
+    # command-line arguments of the unpickling process are ignored
+    monkeypatch.setattr(sys, "argv", [*argv[:-1], "--component.common=5"])
+    copy = pickle.loads(pickle.dumps(tool))
+    assert type(copy) is ParallelTool
+    assert copy.config == tool.config
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_process_items(monkeypatch, n_workers):
+    import os
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "parallel-tool",
+            "--component.cls=Foo",
+            "--component.common=3",
+            f"--n-workers={n_workers}",
+        ],
+    )
+    tool = ParallelTool()
+    tool.setup()
+
+    results = list(tool.process_items(range(20), chunksize=2))
+    assert [value for value, _, _ in results] == [3 * i for i in range(20)]
+
+    # each worker builds its components once
+    components = {(pid, component) for _, pid, component in results}
+    assert len(components) == len({pid for _, pid, _ in results})
+    if n_workers == 1:
+        assert components == {(os.getpid(), id(tool.component))}
+    else:
+        assert os.getpid() not in {pid for pid, _ in components}
+
+
+def test_process_items_lazy(monkeypatch):
+    from itertools import count, islice
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "parallel-tool",
+            "--component.cls=Foo",
+            "--component.common=3",
+            "--n-workers=2",
+        ],
+    )
+    tool = ParallelTool()
+
+    # items are only consumed as needed, so an infinite iterable works
+    results = tool.process_items(count(), chunksize=3)
+    assert [value for value, _, _ in islice(results, 10)] == [3 * i for i in range(10)]
+    results.close()
@@ -113,3 +113,422 @@ def test_configurable_subclasses():
     component = Component(config=config)
     assert isinstance(component.interface, Foo)
     assert component.interface.config.value == 3.0
+
+
+def test_dump_keeps_cls():
+    class Interface(Configurable):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    class Foo(Interface):
+        class __config__(Config):
+            value: int = 0
+
+        def do_something(self):
+            return self.config.value
+
+    class Bar(Interface):
+        class __config__(Config):
+            value: int = 0
+
+        def do_something(self):
+            return self.config.value + 1
+
+    class Component(Configurable):
+        class __config__(Config):
+            interface: Interface.configurable_subclasses() = Bar.__config__()
+            option: int = 1
+
+    for config in (
+        Component.__config__(interface=Foo.__config__(value=2)),
+        Component.__config__(interface=Foo.__config__()),
+    ):
+        for options in ({"exclude_unset": True}, {"exclude_defaults": True}):
+            dumped = config.model_dump(**options)
+            assert dumped["interface"]["cls"] == config.interface.cls
+            assert Component.__config__.model_validate(dumped) == config
+
+            dumped = config.model_dump_json(**options)
+            assert Component.__config__.model_validate_json(dumped) == config
+
+    # explicitly excluding cls still works
+    config = Component.__config__(interface=Foo.__config__(value=2))
+    dumped = config.model_dump(exclude={"interface": {"cls"}})
+    assert dumped["interface"] == {"value": 2}
+    assert config.model_dump(include={"option"}) == {"option": 1}
+
+
+def test_subclass_registry_updated():
+    class Interface(Configurable):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    class Foo(Interface):
+        def do_something(self):
+            return "foo"
+
+    assert isinstance(Interface.from_config({"cls": "Foo"}), Foo)
+    with pytest.raises(ValueError, match="not a known subclass"):
+        Interface.from_config({"cls": "Bar"})
+
+    # defining a new subclass, also indirectly, must update the registry
+    class Bar(Foo):
+        def do_something(self):
+            return "bar"
+
+    assert isinstance(Interface.from_config({"cls": "Bar"}), Bar)
+    assert isinstance(Foo.from_config({"cls": "Bar"}), Bar)
+    assert len(Interface.non_abstract_subclasses()) == 2
+
+
+def test_subclass_registry_weak():
+    import gc
+    import weakref
+
+    class Interface(Configurable):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    class Foo(Interface):
+        def do_something(self):
+            return "foo"
+
+    def define_local():
+        class Local(Interface):
+            def do_something(self):
+                return "local"
+
+        return Local
+
+    local = define_local()
+    assert isinstance(Interface.from_config({"cls": "Local"}), local)
+    assert len(Interface.non_abstract_subclasses()) == 2
+
+    # the registry does not keep subclasses alive that are no longer used
+    ref = weakref.ref(local)
+    del local
+    gc.collect()
+    assert ref() is None
+    assert list(Interface.non_abstract_subclasses().values()) == [Foo]
+    with pytest.raises(ValueError, match="not a known subclass"):
+        Interface.from_config({"cls": "Local"})
+
+
+def test_subclass_name_collision():
+    class Interface(Configurable):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    def make_a():
+        class Impl(Interface):
+            def do_something(self):
+                return "a"
+
+        return Impl
+
+    def make_b():
+        class Impl(Interface):
+            def do_something(self):
+                return "b"
+
+        return Impl
+
+    impl_a = make_a()
+    impl_b = make_b()
+
+    with pytest.raises(ValueError, match="Impl is ambiguous"):
+        Interface.from_config({"cls": "Impl"})
+
+    impl = Interface.from_config({"cls": f"{impl_b.__module__}.{impl_b.__qualname__}"})
+    assert isinstance(impl, impl_b)
+    assert impl.do_something() == "b"
+    assert impl_a in Interface.non_abstract_subclasses().values()
+
+
+def test_configurable_subclasses_cached():
+    class Interface(Configurable):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    class Foo(Interface):
+        def do_something(self):
+            pass
+
+    union = Interface.configurable_subclasses()
+    assert Interface.configurable_subclasses() is union
+
+    class Bar(Interface):
+        def do_something(self):
+            pass
+
+    new_union = Interface.configurable_subclasses()
+    assert new_union is not union
+    assert Interface.configurable_subclasses() is new_union
+
+    class Component(Configurable):
+        class __config__(Config):
+            interface: Interface.configurable_subclasses() = Foo.__config__()
+
+    config = Component.__config__.model_validate({"interface": {"cls": "Bar"}})
+    assert isinstance(config.interface, Bar.__config__)
+
+
+def test_lazy_config():
+    from pydantic_configtree.base import _LazyConfig
+
+    class Interface(Configurable, lazy_config=True):
+        @abstractmethod
+        def do_something(self):
+            pass
+
+    class Foo(Interface):
+        class __config__(Config):
+            value: int = 1
+
+        def do_something(self):
+            return self.config.value
+
+    # config models are not yet created
+    assert isinstance(vars(Interface)["__config__"], _LazyConfig)
+    assert isinstance(vars(Foo)["__config__"], _LazyConfig)
+
+    config_cls = Foo.__config__
+    assert vars(Foo)["__config__"] is config_cls
+    assert Foo.__config__ is config_cls
+    assert issubclass(config_cls, Config)
+    assert config_cls.__qualname__ == "test_lazy_config.<locals>.Foo.__config__"
+
+    config = config_cls(value=2)
+    assert config.cls.endswith("test_lazy_config.<locals>.Foo")
+    assert Foo(config=config).do_something() == 2
+    assert Interface.from_config({"cls": "Foo", "value": 3}).do_something() == 3
+
+    class Component(Configurable):
+        class __config__(Config):
+            interface: Interface.configurable_subclasses() = Foo.__config__()
+
+    assert Component().config.interface.value == 1
+    assert not Component.__lazy_config__
+
+
+def test_settings_sources_top_level(monkeypatch):
+    class Sub(Configurable):
+        class __config__(Config):
+            value: float = 2.0
+
+    class Parent(Configurable):
+        class __config__(Config):
+            sub: Sub.__config__ = Sub.__config__()
+            option: str = "foo"
+
+    class Impl(Parent):
+        class __config__(Parent.__config__):
+            pass
+
+    monkeypatch.setenv("OPTION", "env")
+    monkeypatch.setenv("VALUE", "5.0")
+
+    # the top-level config uses the settings sources
+    assert Parent.__config__().option == "env"
+    assert Parent(config={"sub": {"value": 3.0}}).config.option == "env"
+    assert Parent.from_config({"cls": "Impl"}).config.option == "env"
+
+    # model_validate and configs nested in another config only validate the given values
+    config = Parent.__config__.model_validate({"sub": {}})
+    assert config.option == "foo"
+    assert config.sub.value == 2.0
+    assert Parent.__config__.model_validate_json('{"sub": {}}') == config
+
+    # cls is filled by a default, not a python validator
+    assert config.sub.cls == f"{Sub.__module__}.{Sub.__qualname__}"
+    assert not Sub.__config__.__pydantic_decorators__.model_validators
+    assert Sub.__config__.__pydantic_core_schema__["custom_init"] is False
+
+
+def test_config_must_be_config_subclass():
+    with pytest.raises(TypeError, match="must be a subclass of"):
+
+        class Foo(Configurable):
+            class __config__:
+                value: int = 1
+
+
+def test_base_config_passed_through():
+    from pydantic_configtree.base import count_validations
+
+    class Sub(Configurable):
+        class __config__(Config):
+            value: float = 2.0
+
+    class Interface(Configurable):
+        class __config__(Config):
+            sub: Sub.__config__ = Sub.__config__()
+            option: int = 1
+
+    class Impl(Interface):
+        class __config__(Interface.__config__):
+            extra: int = 5
+
+    sub_config = Sub.__config__(value=3.0)
+    config = Interface.__config__(sub=sub_config, option=2)
+
+    with count_validations() as counts:
+        impl = Impl(config=config)
+        sub = Sub(config=impl.config.sub, parent=impl)
+
+    assert impl.config.option == 2
+    assert impl.config.extra == 5
+    assert impl.config.cls.endswith("Impl")
+    # nested config is reused, not copied or validated again
+    assert impl.config.sub is sub_config
+    assert sub.config is sub_config
+    assert counts == {Impl.__qualname__: 1}
+
+
+def test_base_config_aliases_and_unrelated():
+    from pydantic import Field
+
+    class Interface(Configurable):
+        class __config__(Config):
+            threshold: float = Field(1.0, alias="thr")
+
+    class Impl(Interface):
+        class __config__(Interface.__config__):
+            extra: int = 5
+
+    class Other(Configurable):
+        class __config__(Config):
+            threshold: float = 1.0
+
+    # fields of the base config are validated by name, also if aliased
+    impl = Impl(config=Interface.__config__(thr=3.0))
+    assert impl.config.threshold == 3.0
+
+    # configs of unrelated classes are not converted
+    with pytest.raises(ValidationError):
+        Other(config=Interface.__config__(thr=3.0))
+    with pytest.raises(ValidationError):
+        Impl(config=Other.__config__(threshold=3.0))
+
+
+@pytest.fixture
+def plugin_modules(tmp_path, monkeypatch):
+    """Modules with a Configurable base class and a not yet imported subclass."""
+    import sys
+    from textwrap import dedent
+
+    (tmp_path / "plugin_base.py").write_text(
+        dedent("""
+        from abc import abstractmethod
+
+        from pydantic_configtree import Config, Configurable
+
+        class Operation(Configurable):
+            @abstractmethod
+            def compute(self, value): ...
+
+        class Identity(Operation):
+            def compute(self, value):
+                return value
+
+        class Parent(Configurable):
+            class __config__(Config):
+                op: Operation.configurable_subclasses(import_on_demand=True) = (
+                    Identity.__config__()
+                )
+        """)
+    )
+    (tmp_path / "plugin_impl").mkdir()
+    (tmp_path / "plugin_impl" / "__init__.py").write_text("")
+    (tmp_path / "plugin_impl" / "power.py").write_text(
+        dedent("""
+        from pydantic_configtree import Config
+        from plugin_base import Operation
+
+        class Power(Operation):
+            class __config__(Config):
+                exponent: int = 2
+
+            def compute(self, value):
+                return value**self.config.exponent
+        """)
+    )
+    monkeypatch.syspath_prepend(tmp_path)
+    yield
+    for module in ("plugin_base", "plugin_impl", "plugin_impl.power"):
+        sys.modules.pop(module, None)
+
+
+@pytest.mark.usefixtures("plugin_modules")
+def test_import_on_demand():
+    import sys
+
+    from plugin_base import Operation, Parent
+
+    config = Parent.__config__()
+    assert config.op.cls == "plugin_base.Identity"
+    assert "plugin_impl.power" not in sys.modules
+
+    config = Parent.__config__(op={"cls": "plugin_impl.power.Power", "exponent": 3})
+    assert "plugin_impl.power" in sys.modules
+    assert config.op.exponent == 3
+    assert Parent.__config__.model_validate_json(config.model_dump_json()) == config
+
+    op = Operation.from_config(config.op)
+    assert op.compute(2) == 8
+
+    with pytest.raises(ValidationError, match="not a known subclass"):
+        Parent.__config__(op={"cls": "plugin_impl.missing.Power"})
+
+    with pytest.raises(ValidationError, match="cls is required"):
+        Parent.__config__(op={"exponent": 3})
+
+    schema = Parent.__config__.model_json_schema()
+    op_schema = schema["properties"]["op"]
+    assert op_schema["type"] == "object"
+    assert op_schema["required"] == ["cls"]
+    assert op_schema["properties"]["cls"]["type"] == "string"
+
+
+@pytest.mark.usefixtures("plugin_modules")
+def test_import_on_demand_nested_no_sources(monkeypatch):
+    from plugin_base import Parent
+
+    # like configs in a union, nested configs do not use the settings sources
+    monkeypatch.setenv("EXPONENT", "7")
+    config = Parent.__config__(op={"cls": "plugin_impl.power.Power"})
+    assert config.op.exponent == 2
+    config = Parent.__config__.model_validate_json(
+        '{"op": {"cls": "plugin_impl.power.Power"}}'
+    )
+    assert config.op.exponent == 2
+
+
+@pytest.mark.usefixtures("plugin_modules")
+def test_import_on_demand_entry_point(monkeypatch):
+    import sys
+    from importlib.metadata import EntryPoint, EntryPoints
+
+    from plugin_base import Operation
+
+    import pydantic_configtree.base
+
+    def entry_points(group, name):
+        entry_point = EntryPoint(
+            name="Power", value="plugin_impl.power:Power", group=group
+        )
+        return EntryPoints([entry_point]).select(name=name)
+
+    monkeypatch.setattr(pydantic_configtree.base, "entry_points", entry_points)
+
+    with pytest.raises(ValueError, match="not a known subclass"):
+        Operation.from_config({"cls": "Square"})
+    assert "plugin_impl.power" not in sys.modules
+
+    op = Operation.from_config({"cls": "Power"})
+    assert op.compute(3) == 9
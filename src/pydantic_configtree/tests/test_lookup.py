@@ -1,3 +1,9 @@
+import random
+from fnmatch import fnmatch
+
+import pytest
+from pydantic import ValidationError
+
 from pydantic_configtree import Config
 from pydantic_configtree.lookup import Lookup
 
@@ -67,3 +73,370 @@ def test_lookup_quantity():
     assert (
         settings.option.get(type="MST", id=5) == 1.5 * u.m
     )  # id has precedence over type
+
+
+def _scan_get(entries, **kwargs):
+    """Reference implementation, linear scan over all definitions using fnmatch."""
+    table = {}
+    for index_key, index_value, config_value in entries:
+        table.setdefault(index_key, {})[index_value] = config_value
+
+    value = None
+    for index_key, definitions in table.items():
+        if index_key not in kwargs:
+            continue
+        index_value = kwargs[index_key]
+        for definition, config_value in definitions.items():
+            if isinstance(definition, str):
+                if fnmatch(index_value, definition):
+                    value = config_value
+            elif index_value == definition:
+                value = config_value
+    return value
+
+
+def test_lookup_index_matches_scan():
+    rng = random.Random(0)
+    types = ["LST", "MST", "SST", "MST_NectarCam", "MST_FlashCam"]
+    patterns = ["*", "MST*", "*Cam", "?ST", "[LM]ST", "MST_[NF]*"]
+
+    entries = [("type", "*", -1)]
+    for i in range(500):
+        if rng.random() < 0.3:
+            entries.append(("type", rng.choice(types + patterns), i))
+        else:
+            entries.append(("id", rng.randrange(50), i))
+
+    lookup = Lookup(entries)
+    for tel_type in types + ["ABC"]:
+        for tel_id in range(60):
+            expected = _scan_get(entries, type=tel_type, id=tel_id)
+            assert lookup.get(type=tel_type, id=tel_id) == expected
+            assert lookup.get(id=tel_id, type=tel_type) == expected
+
+
+def test_lookup_not_found():
+    lookup = Lookup([("type", "LST", 1.0), ("id", 1, 2.0)])
+
+    with pytest.raises(KeyError, match="No configuration found"):
+        lookup.get(type="MST", id=2)
+
+    assert lookup.get(type="MST", id=1) == 2.0
+    # str patterns never match non-str values
+    assert Lookup([("id", "*", 1.0)]).get(id="5") == 1.0
+    with pytest.raises(KeyError):
+        Lookup([("id", "*", 1.0)]).get(id=5)
+
+
+def test_lookup_cache_lru():
+    lookup = Lookup([("type", "*", 1.0), ("id", 1, 2.0)], cache_size=2)
+
+    assert lookup.get(id=1) == 2.0
+    assert lookup.get(id=2, type="LST") == 1.0
+    assert lookup.get(id=1) == 2.0
+    # evicts id=2, as id=1 was used more recently
+    assert lookup.get(id=3, type="LST") == 1.0
+
+    info = lookup.cache_info()
+    assert info.hits == 1
+    assert info.misses == 3
+    assert info.evictions == 1
+    assert info.maxsize == 2
+    assert info.currsize == 2
+
+    assert lookup.get(id=1) == 2.0
+    assert lookup.cache_info().hits == 2
+
+    lookup.cache_clear()
+    assert lookup.cache_info() == (0, 0, 0, 2, 0)
+
+
+def test_lookup_cache_disabled():
+    lookup = Lookup([("type", "*", 1.0)], cache_size=0)
+    for _ in range(3):
+        assert lookup.get(type="LST") == 1.0
+
+    assert lookup.cache_info() == (0, 3, 0, 0, 0)
+
+    with pytest.raises(ValueError, match="cache_size"):
+        Lookup([], cache_size=-1)
+
+
+def test_lookup_cache_size_config():
+    class Settings(Config):
+        option: Lookup[float]
+
+    data = {"option": {"entries": [("type", "*", 1.0)], "cache_size": 10}}
+    settings = Settings.model_validate(data)
+    assert settings.option.cache_size == 10
+    assert settings.option.get(type="LST") == 1.0
+
+    dumped = settings.model_dump_json()
+    assert Settings.model_validate_json(dumped) == settings
+
+    # plain list of entries still works and uses an unbounded cache
+    settings = Settings.model_validate_json('{"option": [["type", "*", 1.0]]}')
+    assert settings.option.cache_size is None
+    assert settings.model_dump()["option"] == [("type", "*", 1.0)]
+
+    with pytest.raises(ValidationError):
+        Settings.model_validate({"option": {"entries": [], "cache_size": -1}})
+
+
+def test_lookup_order_independent():
+    lookup = Lookup([("type", "*", 1.0), ("type", "LST", 2.0), ("id", 1, 3.0)])
+
+    assert lookup.get(type="LST", id=1) == 3.0
+    assert lookup.get(id=1, type="LST") == 3.0
+    # unknown index keys do not influence the result
+    assert lookup.get(id=1, type="LST", run=5) == 3.0
+
+    info = lookup.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+    assert info.currsize == 1
+
+
+def test_lookup_bind():
+    lookup = Lookup([("type", "*", 1.0), ("type", "LST", 2.0), ("id", 1, 3.0)])
+
+    by_type_id = lookup.bind("type", "id")
+    by_id_type = lookup.bind("id", "type")
+    by_id = lookup.bind("id")
+
+    assert by_type_id("LST", 2) == 2.0
+    assert by_id_type(2, "LST") == 2.0
+    assert by_id_type(1, "LST") == 3.0
+    assert by_id(1) == 3.0
+
+    assert by_type_id("LST", 1) == lookup.get(id=1, type="LST")
+    assert lookup.cache_info().currsize == 3
+
+    with pytest.raises(KeyError):
+        by_id(2)
+
+    with pytest.raises(TypeError, match="Expected 2 index values"):
+        by_type_id("LST")
+
+    with pytest.raises(ValueError, match="Duplicated"):
+        lookup.bind("id", "id")
+
+
+def test_lookup_get_many():
+    import numpy as np
+
+    lookup = Lookup(
+        [("type", "*", 0.5), ("type", "LST", 5.0), ("id", 1, 3.5), ("id", 5, 1.5)]
+    )
+
+    rng = np.random.default_rng(0)
+    tel_types = rng.choice(["LST", "MST", "SST"], size=(100, 4))
+    tel_ids = rng.integers(0, 10, size=(100, 4))
+
+    values = lookup.get_many(type=tel_types, id=tel_ids)
+    assert values.shape == (100, 4)
+    assert values.dtype == np.float64
+
+    expected = [
+        [lookup.get(type=t, id=i) for t, i in zip(types, ids)]
+        for types, ids in zip(tel_types.tolist(), tel_ids.tolist())
+    ]
+    np.testing.assert_array_equal(values, expected)
+    # each distinct combination is only looked up once
+    assert lookup.cache_info().misses == len(set(zip(tel_types.flat, tel_ids.flat)))
+
+    # broadcasting of scalars
+    np.testing.assert_array_equal(lookup.get_many(type="LST", id=[1, 2]), [3.5, 5.0])
+    empty = lookup.get_many(type="LST", id=[])
+    assert empty.shape == (0,)
+    assert empty.dtype == np.float64
+
+    with pytest.raises(KeyError):
+        lookup.get_many(run=[1, 2])
+
+
+def test_lookup_get_many_dtype():
+    import numpy as np
+
+    # scalars of different types are not converted to a common type
+    lookup = Lookup([("type", "*", "a"), ("type", "LST", 1)])
+    values = lookup.get_many(type=["MST", "LST"])
+    assert values.dtype == object
+    assert values.tolist() == ["a", 1]
+
+    # the dtype of empty results follows the values of the table
+    assert lookup.get_many(type=[]).dtype == object
+    lookup = Lookup([("type", "*", 1), ("type", "LST", 2)])
+    empty = lookup.get_many(type=np.empty((0, 2), dtype=str))
+    assert empty.shape == (0, 2)
+    assert empty.dtype == np.asarray([1]).dtype
+    lookup = Lookup([("type", "*", "a")])
+    assert lookup.get_many(type=[]).dtype.kind == "U"
+
+
+def test_lookup_get_many_object():
+    lookup = Lookup([("type", "*", [1, 2]), ("type", "LST", [3, 4])])
+
+    values = lookup.get_many(type=["LST", "MST"])
+    assert values.dtype == object
+    assert values.shape == (2,)
+    assert values[0] == [3, 4]
+    assert values[1] == [1, 2]
+
+
+def test_lookup_materialize():
+    import numpy as np
+
+    lookup = Lookup([("type", "*", 0.5), ("type", "LST", 5.0), ("id", 1, 3.5)])
+    tel_ids = [1, 2, 3, 10]
+    tel_types = ["LST", "LST", "MST", "SST"]
+
+    table = lookup.materialize(id=tel_ids, type=tel_types)
+    assert len(table) == 4
+    assert table.keys == ("id", "type")
+    np.testing.assert_array_equal(table.values, [3.5, 5.0, 0.5, 0.5])
+    assert not table.values.flags.writeable
+    assert table.get(type="LST", id=2) == 5.0
+
+    with pytest.raises(KeyError, match="not part of the domain"):
+        table.get(type="LST", id=5)
+
+    with pytest.raises(TypeError, match="by=<key>"):
+        table[1]
+
+    table = lookup.materialize(id=tel_ids, type=tel_types, by="id")
+    assert table[1] == 3.5
+    np.testing.assert_array_equal(table[[10, 2, 2]], [0.5, 5.0, 5.0])
+    for invalid in (4, 11, -1):
+        with pytest.raises(KeyError):
+            table[invalid]
+
+    with pytest.raises(ValueError, match="unique"):
+        lookup.materialize(id=[1, 1], type="LST", by="id")
+
+    with pytest.raises(ValueError, match="non-negative integers"):
+        lookup.materialize(type=["LST"], by="type")
+
+
+def test_lookup_materialize_quantity():
+    import astropy.units as u
+    from astropy.tests.helper import assert_quantity_allclose
+
+    from pydantic_configtree.astropy import AstropyQuantity
+
+    class Settings(Config):
+        option: Lookup[AstropyQuantity[u.m]]
+
+    settings = Settings(
+        option=[("type", "*", 50 * u.cm), ("type", "LST", 5 * u.m), ("id", 1, 1 * u.km)]
+    )
+
+    table = settings.option.materialize(
+        id=[1, 2, 3], type=["LST", "LST", "MST"], by="id"
+    )
+    assert isinstance(table.values, u.Quantity)
+    assert table.values.unit == u.m
+    assert_quantity_allclose(table.values, [1000, 5, 0.5] * u.m)
+    assert_quantity_allclose(table[[3, 1]], [0.5, 1000] * u.m)
+
+    values = settings.option.get_many(id=[1, 1, 3], type="LST")
+    assert isinstance(values, u.Quantity)
+    assert_quantity_allclose(values, [1000, 1000, 5] * u.m)
+
+    # incompatible units result in an object array
+    lookup = Lookup([("type", "*", 1 * u.m), ("type", "LST", 1 * u.s)])
+    assert lookup.get_many(type=["LST", "MST"]).dtype == object
+
+
+def test_lookup_validator_reused(monkeypatch):
+    from pydantic_configtree import lookup as lookup_module
+
+    n_built = 0
+    schema_validator = lookup_module.SchemaValidator
+
+    def counting_schema_validator(*args, **kwargs):
+        nonlocal n_built
+        n_built += 1
+        return schema_validator(*args, **kwargs)
+
+    monkeypatch.setattr(lookup_module, "SchemaValidator", counting_schema_validator)
+
+    class Settings(Config):
+        a: Lookup[float]
+        b: Lookup[float]
+
+    data = {"a": [("type", "*", 1.0)], "b": Lookup([("id", 1, 2.0)])}
+    for _ in range(10):
+        settings = Settings.model_validate(data)
+        assert settings.b.get(id=1) == 2.0
+
+    # one validator per field, not one per validation
+    assert n_built == 2
+
+
+def test_lookup_frozen():
+    import pickle
+
+    entries = [("type", "*", 1.0), ("type", "LST", 2.0), ("id", 1, 3.0)]
+    lookup = Lookup(entries, cache_size=2, frozen=True)
+    assert isinstance(lookup.entries, tuple)
+    assert lookup != Lookup(entries, cache_size=2)
+    assert pickle.loads(pickle.dumps(lookup)) == lookup
+    assert "frozen=True" in repr(lookup)
+
+    # bounded cache evicts the oldest entries
+    assert lookup.get(id=1) == 3.0
+    assert lookup.get(type="LST") == 2.0
+    assert lookup.get(id=1) == 3.0
+    assert lookup.get(type="MST") == 1.0
+    info = lookup.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 3, 1, 2)
+
+    class Settings(Config):
+        option: Lookup[float]
+
+    data = {"option": {"entries": entries, "frozen": True}}
+    settings = Settings.model_validate(data)
+    assert settings.option.frozen
+    assert Settings.model_validate_json(settings.model_dump_json()) == settings
+
+
+@pytest.mark.parametrize("cache_size", [None, 16, 0])
+def test_lookup_frozen_threads(cache_size):
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+
+    n_threads = 8
+    n_calls = 5_000
+    types = ["LST", "MST", "SST", "MST_NectarCam"]
+    entries = [("type", "*", 0.0), ("type", "MST*", 1.0), ("type", "LST", 2.0)]
+    entries.extend(("id", i, float(i)) for i in range(0, 200, 3))
+    lookup = Lookup(entries, cache_size=cache_size, frozen=True)
+    reference = Lookup(entries, cache_size=0)
+
+    barrier = Barrier(n_threads)
+
+    def hammer(seed):
+        rng = random.Random(seed)
+        queries = [(rng.choice(types), rng.randrange(200)) for _ in range(n_calls)]
+        get = lookup.bind("type", "id")
+        barrier.wait()
+        return [(query, get(*query)) for query in queries]
+
+    # switch threads as often as possible to provoke races
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(n_threads) as pool:
+            results = list(pool.map(hammer, range(n_threads)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    for thread_results in results:
+        for (tel_type, tel_id), value in thread_results:
+            assert value == reference.get(type=tel_type, id=tel_id)
+
+    info = lookup.cache_info()
+    if cache_size is not None:
+        assert info.currsize <= cache_size
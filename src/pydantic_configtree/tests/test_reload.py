@@ -0,0 +1,331 @@
+import json
+import os
+import sys
+import time
+from abc import abstractmethod
+from functools import partialmethod
+
+import pytest
+from pydantic import Field
+
+from pydantic_configtree import Config, Configurable, Tool
+from pydantic_configtree.lookup import Lookup
+from pydantic_configtree.reload import ConfigWatcher
+
+
+class Cleaner(Configurable):
+    class __config__(Config):
+        threshold: float = 1.0
+        table: Lookup = Lookup([])
+
+    def __init__(self, config=None, parent=None, name=None):
+        super().__init__(config=config, parent=parent, name=name)
+        self.changes = []
+
+    def config_changed(self, old_config, changed):
+        self.changes.append((old_config, changed))
+
+
+class Writer(Cleaner):
+    pass
+
+
+class ServiceTool(Tool):
+    class __config__(Tool.__config__):
+        cleaner: Cleaner.__config__ = Cleaner.__config__()
+        writer: Writer.__config__ = Writer.__config__()
+        value: int = 1
+
+    def setup(self):
+        self.cleaner = Cleaner(self.config.cleaner, parent=self, name="cleaner")
+        self.writer = Writer(self.config.writer, parent=self, name="writer")
+
+    def run(self):
+        pass
+
+
+def write(path, config):
+    path.write_text(json.dumps(config))
+    # make sure the modification time changes also on coarse file systems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_config_watcher(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    write(path, {"cleaner": {"threshold": 2.0, "table": [["id", 1, 5.0]]}, "value": 3})
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path), "--value=7"])
+
+    tool = ServiceTool()
+    tool.setup()
+    assert set(tool.children) == {tool.cleaner, tool.writer}
+
+    watcher = ConfigWatcher(tool)
+    assert watcher.poll() == []
+
+    old_config = tool.config
+    table = tool.config.cleaner.table
+    writer_config = tool.config.writer
+
+    # value is overridden on the command line, so only the threshold changes
+    write(path, {"cleaner": {"threshold": 4.0, "table": [["id", 1, 5.0]]}, "value": 5})
+    assert watcher.poll() == [("cleaner", "threshold")]
+
+    assert tool.config is not old_config
+    assert tool.config.value == 7
+    assert tool.cleaner.config is tool.config.cleaner
+    assert tool.cleaner.config.threshold == 4.0
+    # unchanged values are reused
+    assert tool.config.cleaner.table is table
+    assert tool.writer.config is writer_config
+    assert tool.writer.changes == []
+
+    assert len(tool.cleaner.changes) == 1
+    previous, changed = tool.cleaner.changes[0]
+    assert previous.threshold == 2.0
+    assert changed == [("threshold",)]
+
+    # removing the section restores the defaults
+    write(path, {"value": 5})
+    assert watcher.poll() == [("cleaner",)]
+    assert tool.cleaner.config == Cleaner.__config__()
+    assert tool.cleaner.changes[-1][1] == [()]
+
+
+def wait_for(condition, timeout=5.0):
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError("condition not met")
+        time.sleep(0.01)
+
+
+def test_config_watcher_thread(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    write(path, {"cleaner": {"threshold": 2.0}})
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path)])
+
+    tool = ServiceTool()
+    tool.setup()
+
+    watcher = ConfigWatcher(tool)
+    watcher.start(interval=0.01)
+    with pytest.raises(RuntimeError, match="already running"):
+        watcher.start()
+
+    try:
+        write(path, {"cleaner": {"threshold": 3.0}})
+        wait_for(lambda: tool.cleaner.changes)
+        assert tool.cleaner.config.threshold == 3.0
+
+        # invalid values are logged, the current config is kept
+        write(path, {"cleaner": {"threshold": "invalid"}})
+        time.sleep(0.1)
+        assert tool.cleaner.config.threshold == 3.0
+    finally:
+        watcher.stop()
+    assert watcher._thread is None
+
+
+def test_tool_watch_config(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    write(path, {"cleaner": {"threshold": 2.0}})
+    monkeypatch.setattr(
+        ConfigWatcher, "start", partialmethod(ConfigWatcher.start, interval=0.01)
+    )
+
+    class WatchingTool(ServiceTool):
+        class __config__(ServiceTool.__config__):
+            pass
+
+        def run(self):
+            write(path, {"cleaner": {"threshold": 3.0}})
+            wait_for(lambda: self.cleaner.config.threshold == 3.0)
+
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path), "--watch-config"])
+    tool = WatchingTool()
+    tool.start()
+    assert tool.config.cleaner.threshold == 3.0
+    assert tool.cleaner.changes[-1][1] == [("threshold",)]
+
+
+class Operation(Configurable):
+    def __init__(self, config=None, parent=None, name=None):
+        super().__init__(config=config, parent=parent, name=name)
+        self.changes = []
+
+    def config_changed(self, old_config, changed):
+        self.changes.append(changed)
+
+    @abstractmethod
+    def __call__(self, value):
+        pass
+
+
+class Add(Operation):
+    class __config__(Config):
+        amount: float = Field(1.0, alias="amt")
+
+    def __call__(self, value):
+        return value + self.config.amount
+
+
+class Multiply(Operation):
+    class __config__(Config):
+        factor: float = 2.0
+
+    def __call__(self, value):
+        return value * self.config.factor
+
+
+class PipelineTool(Tool):
+    class __config__(Tool.__config__):
+        operation: Operation.configurable_subclasses() = Add.__config__()
+
+    def setup(self):
+        self.changes = []
+        self.operation = Operation.from_config(self.config.operation, parent=self)
+
+    def config_changed(self, old_config, changed):
+        super().config_changed(old_config, changed)
+        self.changes.append(changed)
+        if type(self.config.operation) is not type(old_config.operation):
+            self.operation = Operation.from_config(self.config.operation, parent=self)
+
+    def run(self):
+        pass
+
+
+def test_config_watcher_alias_and_cls(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    write(path, {"operation": {"cls": "Add", "amt": 2.0}})
+    monkeypatch.setattr(sys, "argv", ["pipeline", "-c", str(path)])
+
+    tool = PipelineTool()
+    tool.setup()
+    watcher = ConfigWatcher(tool)
+    add = tool.operation
+    assert add(1) == 3.0
+
+    # keys given by alias are mapped to the field
+    write(path, {"operation": {"cls": "Add", "amt": 5.0}})
+    assert watcher.poll() == [("operation", "amount")]
+    assert add(1) == 6.0
+    assert add.changes == [[("amount",)]]
+
+    # a changed cls validates the whole config of the operation again,
+    # only the parent is notified and creates a new operation
+    write(path, {"operation": {"cls": "Multiply", "factor": 3.0}})
+    assert watcher.poll() == [("operation",)]
+    assert tool.changes[-1] == [("operation",)]
+    assert isinstance(tool.operation, Multiply)
+    assert tool.operation(2) == 6.0
+    assert add.changes == [[("amount",)]]
+
+
+def test_config_watcher_without_private_hooks(tmp_path, monkeypatch):
+    from pydantic_configtree import reload
+
+    monkeypatch.setattr(reload, "_SETTINGS_HOOKS", ("_hook_of_another_version",))
+    path = tmp_path / "config.json"
+    write(path, {"cleaner": {"threshold": 2.0}})
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path), "--value=7"])
+
+    tool = ServiceTool()
+    tool.setup()
+    watcher = ConfigWatcher(tool)
+
+    # the complete config is compared instead of the values of the sources
+    write(path, {"cleaner": {"threshold": 4.0}, "value": 5})
+    assert watcher.poll() == [("cleaner", "threshold")]
+    assert tool.config.value == 7
+    assert tool.cleaner.config.threshold == 4.0
+
+
+def test_config_watcher_retries_failed_change(tmp_path, monkeypatch):
+    from pydantic import ValidationError
+
+    path = tmp_path / "config.json"
+    write(path, {"cleaner": {"threshold": 2.0}})
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path)])
+
+    tool = ServiceTool()
+    tool.setup()
+    watcher = ConfigWatcher(tool)
+
+    # a failed change is not recorded as applied and is tried again
+    write(path, {"cleaner": {"threshold": "invalid"}})
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            watcher.poll()
+        assert tool.cleaner.config.threshold == 2.0
+
+    write(path, {"cleaner": {"threshold": 3.0}})
+    assert watcher.poll() == [("cleaner", "threshold")]
+    assert tool.cleaner.config.threshold == 3.0
+
+
+class ListTool(Tool):
+    class __config__(Tool.__config__):
+        cleaners: list[Cleaner.__config__] = []
+
+    def setup(self):
+        self.cleaners = [
+            Cleaner(config, parent=self, name=f"cleaner_{i}")
+            for i, config in enumerate(self.config.cleaners)
+        ]
+
+    def run(self):
+        pass
+
+
+def test_config_watcher_configs_in_list(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    write(path, {"cleaners": [{"threshold": 1.0}, {"threshold": 2.0}]})
+    monkeypatch.setattr(sys, "argv", ["list-tool", "-c", str(path)])
+
+    tool = ListTool()
+    tool.setup()
+    watcher = ConfigWatcher(tool)
+
+    # the list is validated again as a whole, all its components are notified
+    write(path, {"cleaners": [{"threshold": 1.0}, {"threshold": 5.0}]})
+    assert watcher.poll() == [("cleaners",)]
+    first, second = tool.cleaners
+    assert first.config is tool.config.cleaners[0]
+    assert second.config is tool.config.cleaners[1]
+    assert second.config.threshold == 5.0
+    assert second.changes[-1][0].threshold == 2.0
+    assert first.changes[-1][1] == second.changes[-1][1] == [()]
+
+
+def write_sectioned(path, config):
+    from pydantic_configtree.sources import write_sectioned_config
+
+    mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+    write_sectioned_config(path, config)
+    # the file is replaced, make sure the modification time changes
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, max(stat.st_mtime_ns, mtime_ns) + 1_000_000))
+
+
+def test_config_watcher_lazy_sections(tmp_path, monkeypatch):
+    path = tmp_path / "config.sjson"
+    write_sectioned(path, {"cleaner": {"threshold": 2.0}, "value": 3})
+    monkeypatch.setattr(sys, "argv", ["service", "-c", str(path)])
+
+    tool = ServiceTool()
+    watcher = ConfigWatcher(tool)
+    assert "cleaner" not in tool.config.__dict__
+
+    # changes of other values do not validate the sections
+    write_sectioned(path, {"cleaner": {"threshold": 2.0}, "value": 4})
+    assert watcher.poll() == [("value",)]
+    assert tool.config.value == 4
+    assert "cleaner" not in tool.config.__dict__
+
+    # a changed section that was not validated yet is validated as a whole
+    write_sectioned(path, {"cleaner": {"threshold": 6.0}, "value": 4})
+    assert watcher.poll() == [("cleaner",)]
+    assert tool.config.cleaner.threshold == 6.0
+    assert tool.config.model_dump()["cleaner"]["threshold"] == 6.0
@@ -0,0 +1,136 @@
+import logging
+import sys
+
+import astropy.units as u
+import pytest
+
+from pydantic_configtree import Config, Configurable, Tool
+from pydantic_configtree.astropy import AstropyQuantity
+from pydantic_configtree.lookup import Lookup
+from pydantic_configtree.snapshot import read_snapshot, schema_hash, write_snapshot
+
+
+class Component(Configurable):
+    class __config__(Config):
+        threshold: Lookup[AstropyQuantity[u.m]] = Lookup([("type", "*", 1 * u.m)])
+
+
+class SnapshotTool(Tool):
+    class __config__(Tool.__config__):
+        value: int = 1
+        component: Component.__config__ = Component.__config__()
+
+    def run(self):
+        pass
+
+
+def test_snapshot_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["snapshot-tool", "--value=5"])
+    tool = SnapshotTool()
+
+    path = tmp_path / "config.snapshot"
+    tool.write_config_snapshot(path)
+
+    loaded = SnapshotTool.from_config_snapshot(path)
+    assert loaded.config == tool.config
+    assert loaded.config.value == 5
+    assert loaded.config.component.threshold.get(type="LST") == 1 * u.m
+
+
+def test_snapshot_schema_changed(tmp_path, monkeypatch, caplog):
+    from pydantic_configtree import snapshot
+
+    monkeypatch.setattr(sys, "argv", ["snapshot-tool"])
+    config = SnapshotTool.__config__.model_validate({"value": 3})
+    path = tmp_path / "config.snapshot"
+    write_snapshot(config, path)
+
+    monkeypatch.setattr(snapshot, "schema_hash", lambda config_cls: "changed")
+    with caplog.at_level(logging.INFO, logger="pydantic_configtree.snapshot"):
+        loaded = read_snapshot(SnapshotTool.__config__, path)
+
+    assert "validating" in caplog.text
+    assert loaded == config
+    assert loaded is not config
+
+
+def test_schema_hash():
+    class Foo(Config):
+        value: AstropyQuantity[u.m] = 1 * u.m
+
+    class Bar(Config):
+        value: AstropyQuantity[u.cm] = 1 * u.m
+
+    class Baz(Config):
+        value: AstropyQuantity[u.m] = 1 * u.m
+
+    Baz.__qualname__ = Foo.__qualname__
+    assert schema_hash(Foo) == schema_hash(Baz)
+    assert schema_hash(Foo) != schema_hash(Bar)
+    assert schema_hash(SnapshotTool.__config__) != schema_hash(Tool.__config__)
+
+
+def test_schema_hash_stable_between_processes():
+    import subprocess
+
+    code = (
+        "import sys; sys.argv = ['snapshot-tool'];"
+        "from pydantic_configtree.tests.test_snapshot import SnapshotTool;"
+        "from pydantic_configtree.snapshot import schema_hash;"
+        "print(schema_hash(SnapshotTool.__config__))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    assert result.stdout.strip() == schema_hash(SnapshotTool.__config__)
+
+
+def test_schema_hash_validator_code():
+    from typing import Annotated
+
+    from pydantic import AfterValidator, field_validator
+
+    def make(offset):
+        if offset == 0:
+
+            class Foo(Config):
+                value: int = 1
+
+                @field_validator("value")
+                @classmethod
+                def check(cls, value):
+                    return value
+
+        else:
+
+            class Foo(Config):
+                value: int = 1
+
+                @field_validator("value")
+                @classmethod
+                def check(cls, value):
+                    return value + 1
+
+        return Foo
+
+    assert schema_hash(make(0)) == schema_hash(make(0))
+    assert schema_hash(make(0)) != schema_hash(make(1))
+
+    class Positive(Config):
+        value: Annotated[int, AfterValidator(lambda v: abs(v))] = 1
+
+    class Negative(Config):
+        value: Annotated[int, AfterValidator(lambda v: -abs(v))] = 1
+
+    Negative.__qualname__ = Positive.__qualname__
+    assert schema_hash(Positive) != schema_hash(Negative)
+
+
+def test_snapshot_invalid_version(tmp_path):
+    import pickle
+
+    path = tmp_path / "config.snapshot"
+    path.write_bytes(pickle.dumps({"version": -1}))
+
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        read_snapshot(Config, path)
@@ -0,0 +1,370 @@
+import json
+import os
+
+import pytest
+
+from pydantic_configtree.sources import ConfigFileCache
+
+
+@pytest.fixture
+def counting_parse():
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return json.loads(path.read_text())
+
+    parse.calls = calls
+    return parse
+
+
+def test_config_file_cache(tmp_path, counting_parse):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"value": 1}))
+
+    cache = ConfigFileCache()
+    assert cache.load(path, counting_parse) == {"value": 1}
+    assert cache.load(tmp_path / "." / "config.json", counting_parse) == {"value": 1}
+    assert len(counting_parse.calls) == 1
+    assert path in cache
+
+    # changed size
+    path.write_text(json.dumps({"value": 10}))
+    assert cache.load(path, counting_parse) == {"value": 10}
+    assert len(counting_parse.calls) == 2
+
+    # same size, but changed modification time
+    path.write_text(json.dumps({"value": 20}))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.load(path, counting_parse) == {"value": 20}
+    assert len(counting_parse.calls) == 3
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.load(path, counting_parse) == {"value": 20}
+    assert len(counting_parse.calls) == 4
+
+
+def test_config_file_cache_copies(tmp_path, counting_parse):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"a": {"values": [1]}}))
+
+    # modifying the returned data does not change the cached data
+    cache = ConfigFileCache()
+    cache.load(path, counting_parse)["a"]["values"].append(2)
+    data = cache.load(path, counting_parse)
+    assert data == {"a": {"values": [1]}}
+    data["a"]["values"].append(3)
+    assert cache.load(path, counting_parse) == {"a": {"values": [1]}}
+    assert len(counting_parse.calls) == 1
+
+
+def test_config_file_cache_maxsize(tmp_path, counting_parse):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"config_{i}.json"
+        path.write_text(json.dumps({"value": i}))
+        paths.append(path)
+
+    cache = ConfigFileCache(maxsize=2)
+    for path in paths:
+        cache.load(path, counting_parse)
+
+    assert len(cache) == 2
+    assert paths[0] not in cache
+    assert paths[2] in cache
+
+    cache = ConfigFileCache(maxsize=0)
+    cache.load(paths[0], counting_parse)
+    cache.load(paths[0], counting_parse)
+    assert len(cache) == 0
+    assert len(counting_parse.calls) == 5
+
+
+@pytest.mark.parametrize("fmt", [".json", ".yml", ".yaml", ".toml"])
+def test_parse_config_file(tmp_path, fmt):
+    import tomlkit
+    import yaml
+
+    from pydantic_configtree.sources import parse_config_file
+
+    config = {"value": 2, "nested": {"name": "foo", "values": [1.5, 2.5]}}
+    path = tmp_path / f"config{fmt}"
+
+    if fmt == ".json":
+        path.write_text(json.dumps(config))
+    elif fmt == ".toml":
+        path.write_text(tomlkit.dumps(config))
+    else:
+        path.write_text(yaml.safe_dump(config))
+
+    assert parse_config_file(path) == config
+
+
+def test_parse_yaml_without_libyaml(tmp_path, monkeypatch):
+    import yaml
+
+    from pydantic_configtree.sources import parse_config_file
+
+    monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+
+    path = tmp_path / "config.yaml"
+    path.write_text("value: 1\n")
+    assert parse_config_file(path) == {"value": 1}
+
+    path.write_text("")
+    assert parse_config_file(path) == {}
+
+
+def test_parse_unsupported(tmp_path):
+    from pydantic_configtree.sources import parse_config_file
+
+    path = tmp_path / "config.ini"
+    path.write_text("[foo]")
+    with pytest.raises(ValueError, match="unsupported format"):
+        parse_config_file(path)
+
+
+def test_deep_merge():
+    from pydantic_configtree.sources import deep_merge, find_origin
+
+    base_file = {
+        "a": {"b": 1, "c": [1, 2], "d": {"e": 1}},
+        "f": 1,
+    }
+    override_file = {"a": {"c": [3], "d": {"g": 2}}, "h": {"i": 1}}
+
+    origins = {}
+    config = deep_merge({}, base_file, "base", origins)
+    deep_merge(config, override_file, "override", origins)
+
+    assert config == {
+        "a": {"b": 1, "c": [3], "d": {"e": 1, "g": 2}},
+        "f": 1,
+        "h": {"i": 1},
+    }
+    # inputs are not modified
+    assert base_file == {"a": {"b": 1, "c": [1, 2], "d": {"e": 1}}, "f": 1}
+    assert override_file == {"a": {"c": [3], "d": {"g": 2}}, "h": {"i": 1}}
+
+    assert find_origin(origins, ("a", "b")) == "base"
+    assert find_origin(origins, ("a", "c")) == "override"
+    assert find_origin(origins, ("a", "d", "e")) == "base"
+    assert find_origin(origins, ("a", "d", "g")) == "override"
+    assert find_origin(origins, ("h", "i")) == "override"
+    assert find_origin(origins, ("x",)) is None
+
+    # replacing a mapping with a scalar drops the origins of nested values
+    deep_merge(config, {"a": 5}, "scalar", origins)
+    assert config["a"] == 5
+    assert find_origin(origins, ("a", "d", "g")) == "scalar"
+    assert ("a", "d", "g") not in origins
+
+    # replacing a scalar only changes its own origin
+    deep_merge(config, {"f": 2}, "other", origins)
+    assert origins == {("a",): "scalar", ("f",): "other", ("h",): "override"}
+
+
+def test_sectioned_config(tmp_path):
+    from pydantic_configtree.sources import (
+        LazySection,
+        deep_merge,
+        parse_config_file,
+        write_sectioned_config,
+    )
+
+    config = {"value": 2, "nested": {"name": "foo"}, "entries": [["id", 1, 2.0]]}
+    path = tmp_path / "config.sjson"
+    write_sectioned_config(path, config)
+
+    sections = parse_config_file(path)
+    assert all(isinstance(section, LazySection) for section in sections.values())
+    assert {key: section.load() for key, section in sections.items()} == config
+
+    # merging decodes sections only where needed
+    merged = deep_merge({}, sections)
+    deep_merge(merged, {"nested": {"value": 1}, "value": 3})
+    assert merged["nested"] == {"name": "foo", "value": 1}
+    assert merged["value"] == 3
+    assert isinstance(merged["entries"], LazySection)
+
+    path = tmp_path / "invalid.sjson"
+    path.write_bytes(b"\0" * 16)
+    with pytest.raises(ValueError, match="not a sectioned config file"):
+        parse_config_file(path)
+
+
+def test_sectioned_config_lazy_validation(tmp_path, monkeypatch):
+    import copy
+
+    from pydantic_configtree import Config
+    from pydantic_configtree.cli import Tool
+    from pydantic_configtree.sources import LazySection, write_sectioned_config
+
+    class Small(Config):
+        value: int = 0
+
+    class Large(Config):
+        values: list[float] = []
+
+    class LazyTool(Tool):
+        class __config__(Tool.__config__):
+            small: Small = Small()
+            large: Large = Large()
+            required: int
+
+        def run(self):
+            pass
+
+    path = tmp_path / "config.sjson"
+    write_sectioned_config(
+        path,
+        {"small": {"value": 1}, "large": {"values": [1.0, 2.0]}, "required": 5},
+    )
+
+    loaded = []
+    load = LazySection.load
+
+    def counting_load(self):
+        loaded.append(self)
+        return load(self)
+
+    monkeypatch.setattr(LazySection, "load", counting_load)
+    monkeypatch.setattr("sys.argv", ["lazy-tool", "--config", str(path)])
+    tool = LazyTool()
+
+    # required field is validated directly, others on access
+    assert tool.config.required == 5
+    assert len(loaded) == 1
+    assert "large" not in tool.config.__dict__
+    assert "large=<LazySection" in repr(tool.config)
+
+    assert tool.config.small.value == 1
+    assert len(loaded) == 2
+    assert tool.config.large.values == [1.0, 2.0]
+    assert len(loaded) == 3
+    assert tool.config.model_fields_set >= {"small", "large", "required"}
+
+    # everything else validates the remaining sections
+    for func in (copy.deepcopy, Config.__getstate__, Config.model_dump):
+        tool = LazyTool()
+        func(tool.config)
+        assert "large" in tool.config.__dict__
+        assert tool.config.__pydantic_private__ is None
+
+    # shallow copies keep the sections, but validate them independently
+    tool = LazyTool()
+    shallow = copy.copy(tool.config)
+    assert shallow.large.values == [1.0, 2.0]
+    assert "large" not in tool.config.__dict__
+    assert "large" in shallow.__dict__
+    assert tool.config.large.values == [1.0, 2.0]
+
+
+def test_sectioned_config_not_deferred(tmp_path, monkeypatch):
+    from pydantic import BaseModel, ConfigDict, model_validator
+
+    from pydantic_configtree import Config
+    from pydantic_configtree.cli import Tool
+    from pydantic_configtree.sources import write_sectioned_config
+
+    class Small(Config):
+        value: int = 1
+
+    seen = []
+
+    class ValidatedTool(Tool):
+        class __config__(Tool.__config__):
+            small: Small = Small()
+
+            @model_validator(mode="after")
+            def record_value(self):
+                seen.append(self.small.value)
+                return self
+
+        def run(self):
+            pass
+
+    class FrozenTool(Tool):
+        class __config__(Tool.__config__):
+            small: Small = Small()
+            model_config = ConfigDict(frozen=True)
+
+        def run(self):
+            pass
+
+    class LazyTool(Tool):
+        class __config__(Tool.__config__):
+            small: Small = Small()
+
+        def run(self):
+            pass
+
+    path = tmp_path / "config.sjson"
+    write_sectioned_config(path, {"small": {"value": 5}})
+    monkeypatch.setattr("sys.argv", ["tool", "--config", str(path)])
+
+    # model validators see the values of the sections, not the defaults
+    config = ValidatedTool().config
+    assert config.small.value == 5
+    assert seen == [5]
+
+    # frozen configs cannot be updated later, sections are validated directly
+    config = FrozenTool().config
+    assert "small" in config.__dict__
+    assert config.small.value == 5
+
+    # dumping a config nested in another model validates the deferred sections
+    class Outer(BaseModel):
+        config: LazyTool.__config__
+
+    config = LazyTool().config
+    assert "small" not in config.__dict__
+    assert Outer(config=config).model_dump()["config"]["small"]["value"] == 5
+
+
+def test_sectioned_config_merged_sources(tmp_path, monkeypatch):
+    from pydantic_settings import SettingsConfigDict
+
+    from pydantic_configtree import Config
+    from pydantic_configtree.cli import Tool
+    from pydantic_configtree.sources import write_sectioned_config
+
+    class Small(Config):
+        value: int = 0
+        name: str = "default"
+
+    class SectionTool(Tool):
+        class __config__(Tool.__config__):
+            small: Small = Small()
+            other: Small = Small()
+
+        def run(self):
+            pass
+
+    class PartialUpdateTool(SectionTool):
+        class __config__(SectionTool.__config__):
+            model_config = SettingsConfigDict(nested_model_default_partial_update=True)
+
+    data = {"small": {"value": 5}, "other": {"value": 3}}
+    for suffix in (".json", ".sjson"):
+        path = tmp_path / f"config{suffix}"
+        if suffix == ".sjson":
+            write_sectioned_config(path, data)
+        else:
+            path.write_text(json.dumps(data))
+        monkeypatch.setattr("sys.argv", ["section-tool", "--config", str(path)])
+
+        # values of other sources are merged into the section
+        monkeypatch.setenv("CTAPIPE_SMALL", '{"name": "env"}')
+        config = SectionTool().config
+        assert config.small == Small(value=5, name="env")
+        assert config.other == Small(value=3)
+        monkeypatch.delenv("CTAPIPE_SMALL")
+
+        # sources dumping their values get the decoded sections
+        config = PartialUpdateTool().config
+        assert config.small.value == 5
+        assert config.other.value == 3